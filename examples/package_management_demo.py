@@ -11,225 +11,296 @@ This script demonstrates:
 """
 
 import asyncio
+import gzip
+import logging
+import os
+import sys
 from typing import Any
 
 import httpx
+import orjson
 
 SERVER_URL = "http://localhost:8000"
 
+logger = logging.getLogger("demo")
 
-async def create_image(languages: list[str]) -> str:
-    """Create a Docker image with specified languages."""
-    print(f"🔨 Creating image with languages: {', '.join(languages)}")
-
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        response = await client.post(
-            f"{SERVER_URL}/images/create",
-            json={
-                "languages": languages,
-                "image_name": f"demo-{'-'.join(languages)}",
-                "requirements": {},
-            },
-        )
-        response.raise_for_status()
+# Polling backs off exponentially so short executions are picked up quickly
+POLL_INITIAL_DELAY = 0.05
+POLL_MAX_DELAY = 2.0
+POLL_BACKOFF = 1.7
+POLL_TIMEOUT = 120.0
+# Execution states after which the status no longer changes
+TERMINAL_STATUSES = ("completed", "failed", "not_found")
 
-        result = response.json()
-        if result["success"]:
-            print(f"✅ Image created: {result['image_id'][:12]}...")
-            return result["image_id"]
-        else:
-            raise Exception(f"Image creation failed: {result['error_message']}")
 
+# Request bodies are serialized with orjson rather than httpx's stdlib json encoder
+JSON_HEADERS = {"content-type": "application/json"}
+# Bodies at least this large (code, file contents) are gzip-compressed before sending
+GZIP_MIN_SIZE = 1024
+GZIP_JSON_HEADERS = {**JSON_HEADERS, "content-encoding": "gzip"}
+# Cap on concurrent requests that make the server call Docker (image builds, installs, runs)
+MAX_INFLIGHT = int(os.environ.get("MCP_EXECUTOR_MAX_INFLIGHT", "8"))
+_inflight = asyncio.Semaphore(MAX_INFLIGHT)
 
-async def install_package(image_id: str, language: str, package_name: str) -> str:
-    """Install a package in an image and return the new image ID."""
-    print(f"📦 Installing {package_name} for {language}")
-
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        response = await client.post(
-            f"{SERVER_URL}/packages/install",
-            json={
-                "image_id": image_id,
-                "language": language,
-                "package_name": package_name,
-                "build_new_image": True,
-            },
-        )
-        response.raise_for_status()
 
-        result = response.json()
-        if result["success"]:
-            print(f"✅ Package {package_name} installed successfully")
-            return result["new_image_id"]
-        else:
-            raise Exception(f"Package installation failed: {result['error_message']}")
+async def _post(client: httpx.AsyncClient, url: str, payload: Any) -> httpx.Response:
+    """POST an orjson-encoded JSON body, gzip-compressed when it is large."""
+    body = orjson.dumps(payload)
+    headers = JSON_HEADERS
+    if len(body) >= GZIP_MIN_SIZE:
+        body = gzip.compress(body, compresslevel=1)
+        headers = GZIP_JSON_HEADERS
 
+    async with _inflight:
+        return await client.post(url, content=body, headers=headers)
 
-async def execute_code(image_id: str, language: str, code: str, expected_output: str | None = None) -> bool:
-    """Execute code and verify the output."""
-    print(f"🚀 Executing {language} code...")
-
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        response = await client.post(
-            f"{SERVER_URL}/execute",
-            json={
-                "image_id": image_id,
-                "language": language,
-                "code": code,
-                "resource_limits": {"network_enabled": True},
-            },
-        )
-        response.raise_for_status()
-
-        result = response.json()
-        execution_id = result["execution_id"]
-
-        # Poll for completion
-        for _i in range(60):
-            await asyncio.sleep(1)
-            status_response = await client.get(f"{SERVER_URL}/executions/{execution_id}")
-            status_response.raise_for_status()
-            status = status_response.json()
-
-            if status["status"] == "completed":
-                print(f"✅ {language} execution completed!")
-                print(f"Output: {status['stdout']}")
-
-                if expected_output and expected_output not in status["stdout"]:
-                    print(f"❌ Expected output '{expected_output}' not found")
-                    return False
-
-                return True
-            elif status["status"] == "failed":
-                print(f"❌ {language} execution failed: {status.get('error_message', 'Unknown error')}")
-                print(f"Output: {status['stdout']}")
-                print(f"Errors: {status['stderr']}")
-                return False
-
-        print(f"⏰ {language} execution timed out")
-        return False
 
+def _ok(response: httpx.Response) -> Any:
+    """Raise on an HTTP error status, otherwise return the orjson-decoded body."""
+    response.raise_for_status()
+    return orjson.loads(response.content)
 
-async def upload_file(filename: str, content: str, language: str) -> str:
-    """Upload a file and return the file ID."""
-    print(f"📁 Uploading {filename} ({language})")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{SERVER_URL}/files/upload",
-            json={"filename": filename, "content": content, "language": language},
-        )
-        response.raise_for_status()
+async def create_image(client: httpx.AsyncClient, languages: list[str]) -> str:
+    """Create a Docker image with specified languages."""
+    logger.info(f"🔨 Creating image with languages: {', '.join(languages)}")
+
+    response = await _post(
+        client,
+        f"{SERVER_URL}/images/create",
+        {
+            "languages": languages,
+            "image_name": f"demo-{'-'.join(languages)}",
+            "requirements": {},
+        },
+    )
+    result = _ok(response)
+    if result["success"]:
+        logger.info(f"✅ Image created: {result['image_id'][:12]}...")
+        return result["image_id"]
+    else:
+        raise Exception(f"Image creation failed: {result['error_message']}")
+
+
+async def install_package(client: httpx.AsyncClient, image_id: str, language: str, package_name: str) -> str:
+    """Install a package in an image and return the new image ID."""
+    logger.info(f"📦 Installing {package_name} for {language}")
 
-        result = response.json()
-        if result["success"]:
-            print(f"✅ File uploaded: {result['file_id']}")
-            return result["file_id"]
+    response = await _post(
+        client,
+        f"{SERVER_URL}/packages/install",
+        {
+            "image_id": image_id,
+            "language": language,
+            "package_name": package_name,
+            "build_new_image": True,
+        },
+    )
+    result = _ok(response)
+    if result["success"]:
+        logger.info(f"✅ Package {package_name} installed successfully")
+        return result["new_image_id"]
+    else:
+        raise Exception(f"Package installation failed: {result['error_message']}")
+
+
+class ExecutionPoller:
+    """Resolve pending executions with one batched status request per timer tick."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self._waiters: dict[str, asyncio.Future[dict[str, Any]]] = {}
+        self._delay = POLL_INITIAL_DELAY
+        # True while a tick is scheduled or its request is in flight
+        self._scheduled = False
+        self._task: asyncio.Task[None] | None = None
+
+    async def wait(self, execution_id: str) -> dict[str, Any] | None:
+        """Wait for an execution to complete or fail; return None on timeout."""
+        loop = asyncio.get_running_loop()
+        future = self._waiters.get(execution_id)
+        if future is None:
+            future = self._waiters[execution_id] = loop.create_future()
+
+        # A new waiter should not inherit the backed-off delay of older ones
+        self._delay = POLL_INITIAL_DELAY
+        if not self._scheduled:
+            # Check straight away: short runs are often finished before the first poll
+            self._scheduled = True
+            loop.call_soon(self._tick)
+
+        try:
+            return await asyncio.wait_for(future, POLL_TIMEOUT)
+        except TimeoutError:
+            return None
+        finally:
+            self._waiters.pop(execution_id, None)
+
+    def _tick(self) -> None:
+        """Timer callback: start one batched status request for every waiter."""
+        self._task = asyncio.create_task(self._poll())
+
+    async def _poll(self) -> None:
+        """Fetch the status of all pending executions and resolve finished ones."""
+        pending = {execution_id: future for execution_id, future in self._waiters.items() if not future.done()}
+        try:
+            if pending:
+                response = await self.client.get(f"{SERVER_URL}/executions", params={"ids": ",".join(pending)})
+                for status in _ok(response):
+                    future = pending.get(status["execution_id"])
+                    if future is not None and not future.done() and status["status"] in TERMINAL_STATUSES:
+                        future.set_result(status)
+        except httpx.HTTPError as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+
+        if any(not future.done() for future in self._waiters.values()):
+            asyncio.get_running_loop().call_later(self._delay, self._tick)
+            self._delay = min(self._delay * POLL_BACKOFF, POLL_MAX_DELAY)
         else:
-            raise Exception(f"File upload failed: {result['error_message']}")
+            self._scheduled = False
 
 
-async def execute_file(file_id: str, image_id: str) -> bool:
-    """Execute an uploaded file."""
-    print(f"🎯 Executing uploaded file: {file_id}")
+async def execute_code(
+    client: httpx.AsyncClient,
+    poller: ExecutionPoller,
+    image_id: str,
+    language: str,
+    code: str,
+    expected_output: str | None = None,
+) -> bool:
+    """Execute code and verify the output."""
+    logger.info(f"🚀 Executing {language} code...")
 
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        response = await client.post(
-            f"{SERVER_URL}/files/{file_id}/execute",
-            json={"file_id": file_id, "image_id": image_id},
-        )
-        response.raise_for_status()
-
-        result = response.json()
-        execution_id = result["execution_id"]
-
-        # Poll for completion
-        for _i in range(60):
-            await asyncio.sleep(1)
-            status_response = await client.get(f"{SERVER_URL}/executions/{execution_id}")
-            status_response.raise_for_status()
-            status = status_response.json()
-
-            if status["status"] == "completed":
-                print("✅ File execution completed!")
-                print(f"Output: {status['stdout']}")
-                return True
-            elif status["status"] == "failed":
-                print(f"❌ File execution failed: {status.get('error_message', 'Unknown error')}")
-                print(f"Output: {status['stdout']}")
-                print(f"Errors: {status['stderr']}")
-                return False
-
-        print("⏰ File execution timed out")
+    response = await _post(
+        client,
+        f"{SERVER_URL}/execute",
+        {
+            "image_id": image_id,
+            "language": language,
+            "code": code,
+            "resource_limits": {"network_enabled": True},
+        },
+    )
+    status = _ok(response)
+    # Short runs come back finished; only poll while the server reports them in progress
+    if status["status"] in ("pending", "running"):
+        status = await poller.wait(status["execution_id"])
+
+    if status is None:
+        logger.warning(f"⏰ {language} execution timed out")
         return False
 
+    if status["status"] == "completed":
+        logger.info(f"✅ {language} execution completed!")
+        logger.info(f"Output: {status['stdout']}")
 
-async def list_files() -> dict[str, Any]:
-    """List uploaded files."""
-    print("📋 Listing uploaded files...")
+        if expected_output and expected_output not in status["stdout"]:
+            logger.error(f"❌ Expected output '{expected_output}' not found")
+            return False
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{SERVER_URL}/files")
-        response.raise_for_status()
+        return True
 
-        result = response.json()
-        print(f"Total files: {result['total_count']}")
+    logger.error(f"❌ {language} execution failed: {status.get('error_message', 'Unknown error')}")
+    logger.info(f"Output: {status['stdout']}")
+    logger.info(f"Errors: {status['stderr']}")
+    return False
 
-        for file_info in result["files"]:
-            print(f"  - {file_info['filename']} ({file_info['language']}) - {file_info['file_id'][:8]}...")
 
-        return result
+async def upload_files_batch(client: httpx.AsyncClient, items: list[tuple[str, str, str]]) -> list[str]:
+    """Upload (filename, content, language) items in one request and return their file IDs."""
+    logger.info(f"📁 Uploading {', '.join(f'{filename} ({language})' for filename, _, language in items)}")
 
+    response = await _post(
+        client,
+        f"{SERVER_URL}/files/upload:batch",
+        {
+            "files": [
+                {"filename": filename, "content": content, "language": language}
+                for filename, content, language in items
+            ]
+        },
+    )
+    file_ids = []
+    for result in _ok(response):
+        if not result["success"]:
+            raise Exception(f"File upload failed: {result['error_message']}")
+        logger.info(f"✅ File uploaded: {result['file_id']}")
+        file_ids.append(result["file_id"])
+
+    return file_ids
+
+
+async def execute_files_batch(client: httpx.AsyncClient, items: list[tuple[str, str]]) -> list[bool]:
+    """Execute (file_id, image_id) items in one request."""
+    logger.info(f"🎯 Executing uploaded files: {', '.join(file_id for file_id, _ in items)}")
+
+    response = await _post(
+        client,
+        f"{SERVER_URL}/files/execute:batch",
+        {"executions": [{"file_id": file_id, "image_id": image_id} for file_id, image_id in items]},
+    )
+    outcomes = []
+    for status in _ok(response):
+        if status["status"] == "completed":
+            logger.info("✅ File execution completed!")
+            logger.info(f"Output: {status['stdout']}")
+            outcomes.append(True)
+        else:
+            logger.error(f"❌ File execution failed: {status.get('error_message', 'Unknown error')}")
+            logger.info(f"Output: {status['stdout']}")
+            logger.info(f"Errors: {status['stderr']}")
+            outcomes.append(False)
 
-async def delete_file(file_id: str) -> bool:
-    """Delete an uploaded file."""
-    print(f"🗑️ Deleting file: {file_id}")
+    return outcomes
 
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(f"{SERVER_URL}/files/{file_id}")
-        response.raise_for_status()
 
-        result = response.json()
-        if result["success"]:
-            print("✅ File deleted successfully")
-            return True
-        else:
-            print(f"❌ File deletion failed: {result.get('detail', 'Unknown error')}")
-            return False
+async def list_files(client: httpx.AsyncClient) -> dict[str, Any]:
+    """List uploaded files."""
+    logger.info("📋 Listing uploaded files...")
 
+    response = await client.get(f"{SERVER_URL}/files")
+    result = _ok(response)
+    logger.info(f"Total files: {result['total_count']}")
 
-async def get_file_stats() -> dict[str, Any]:
-    """Get file manager statistics."""
-    print("📊 Getting file statistics...")
+    for file_info in result["files"]:
+        logger.info(f"  - {file_info['filename']} ({file_info['language']}) - {file_info['file_id'][:8]}...")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{SERVER_URL}/files/stats")
-        response.raise_for_status()
+    return result
 
-        result = response.json()
-        print(f"Total files: {result['total_files']}")
-        print(f"Total size: {result['total_size']} bytes")
-        print("Files by language:")
-        for lang, count in result["files_by_language"].items():
-            print(f"  - {lang}: {count} files")
 
-        return result
+async def delete_files_batch(client: httpx.AsyncClient, file_ids: list[str]) -> bool:
+    """Delete several uploaded files in one request."""
+    logger.info(f"🗑️ Deleting files: {', '.join(file_ids)}")
 
+    response = await _post(client, f"{SERVER_URL}/files:delete-batch", {"file_ids": file_ids})
+    result = _ok(response)
+    if result["not_found"]:
+        logger.error(f"❌ Files not found: {', '.join(result['not_found'])}")
+        return False
 
-async def main():
-    """Main demonstration function."""
-    print("🎉 MCP Docker Executor - Comprehensive Feature Demo")
-    print("=" * 60)
+    logger.info("✅ Files deleted successfully")
+    return True
 
-    try:
-        # 1. Create base image with all languages
-        base_image_id = await create_image(["python", "node", "csharp"])
 
-        # 2. Test Python package management
-        print("\n🐍 Python Package Management")
-        print("-" * 30)
+async def get_file_stats(client: httpx.AsyncClient) -> dict[str, Any]:
+    """Get file manager statistics."""
+    logger.info("📊 Getting file statistics...")
+
+    response = await client.get(f"{SERVER_URL}/files/stats")
+    result = _ok(response)
+    logger.info(f"Total files: {result['total_files']}")
+    logger.info(f"Total size: {result['total_size']} bytes")
+    logger.info("Files by language:")
+    for lang, count in result["files_by_language"].items():
+        logger.info(f"  - {lang}: {count} files")
+
+    return result
 
-        python_code = """
+
+# Programs run against the images with installed packages
+PYTHON_CODE = """
 import requests
 try:
     response = requests.get('https://httpbin.org/json')
@@ -240,17 +311,7 @@ except Exception as e:
     print("✅ Requests library is installed and imported successfully!")
 """
 
-        # Install requests package
-        python_image_id = await install_package(base_image_id, "python", "requests")
-
-        # Execute code with requests
-        await execute_code(python_image_id, "python", python_code, "Requests library")
-
-        # 3. Test Node.js package management
-        print("\n🟢 Node.js Package Management")
-        print("-" * 30)
-
-        node_code = """
+NODE_CODE = """
 const _ = require('lodash');
 const numbers = [1, 2, 3, 4, 5];
 const doubled = _.map(numbers, n => n * 2);
@@ -261,17 +322,7 @@ console.log(`Doubled: ${JSON.stringify(doubled)}`);
 console.log(`Sum: ${sum}`);
 """
 
-        # Install lodash package
-        node_image_id = await install_package(base_image_id, "node", "lodash")
-
-        # Execute code with lodash
-        await execute_code(node_image_id, "node", node_code, "Lodash library")
-
-        # 4. Test C# package management
-        print("\n🔵 C# Package Management")
-        print("-" * 30)
-
-        csharp_code = """
+CSHARP_CODE = """
 using Newtonsoft.Json;
 using System;
 
@@ -290,77 +341,60 @@ public class Program
 }
 """
 
-        # Install Newtonsoft.Json package
-        csharp_image_id = await install_package(base_image_id, "csharp", "Newtonsoft.Json")
-
-        # Execute code with Newtonsoft.Json
-        await execute_code(csharp_image_id, "csharp", csharp_code, "Newtonsoft.Json")
-
-        # 5. Test file management
-        print("\n📁 File Management")
-        print("-" * 30)
-
-        # Upload Python file
-        python_file_content = """
-def factorial(n):
-    if n <= 1:
-        return 1
-    return n * factorial(n - 1)
-
-def combinations(n, r):
-    if r > n or r < 0:
-        return 0
-    return factorial(n) // (factorial(r) * factorial(n - r))
+# Programs uploaded through the file management API
+PYTHON_FILE_CONTENT = """
+from math import comb, factorial
 
 print("Python Combinations Calculator")
 print("=" * 30)
 print(f"factorial(5) = {factorial(5)}")
-print(f"combinations(5, 2) = {combinations(5, 2)}")
-print(f"combinations(10, 3) = {combinations(10, 3)}")
+print(f"combinations(5, 2) = {comb(5, 2)}")
+print(f"combinations(10, 3) = {comb(10, 3)}")
 print("✅ Python combinations calculation completed!")
 """
 
-        python_file_id = await upload_file("combinations.py", python_file_content, "python")
-
-        # Upload Node.js file
-        node_file_content = """
+NODE_FILE_CONTENT = """
 function factorial(n) {
-    if (n <= 1) {
-        return 1;
+    let result = 1;
+    for (let i = 2; i <= n; i++) {
+        result *= i;
     }
-    return n * factorial(n - 1);
+    return result;
 }
 
 function combinations(n, r) {
     if (r > n || r < 0) {
         return 0;
     }
-    return factorial(n) / (factorial(r) * factorial(n - r));
+    r = Math.min(r, n - r);
+    let result = 1;
+    for (let i = 1; i <= r; i++) {
+        result = (result * (n - r + i)) / i;
+    }
+    return result;
 }
 
 console.log("Node.js Combinations Calculator");
-console.log("=" * 30);
+console.log("=".repeat(30));
 console.log(`factorial(5) = ${factorial(5)}`);
 console.log(`combinations(5, 2) = ${combinations(5, 2)}`);
 console.log(`combinations(10, 3) = ${combinations(10, 3)}`);
 console.log("✅ Node.js combinations calculation completed!");
 """
 
-        node_file_id = await upload_file("combinations.js", node_file_content, "node")
-
-        # Upload C# file
-        csharp_file_content = """
+CSHARP_FILE_CONTENT = """
 using System;
 
 public class Program
 {
     public static long Factorial(int n)
     {
-        if (n <= 1)
+        long result = 1;
+        for (int i = 2; i <= n; i++)
         {
-            return 1;
+            result *= i;
         }
-        return n * Factorial(n - 1);
+        return result;
     }
 
     public static long Combinations(int n, int r)
@@ -369,13 +403,19 @@ public class Program
         {
             return 0;
         }
-        return Factorial(n) / (Factorial(r) * Factorial(n - r));
+        r = Math.Min(r, n - r);
+        long result = 1;
+        for (int i = 1; i <= r; i++)
+        {
+            result = result * (n - r + i) / i;
+        }
+        return result;
     }
 
     public static void Main(string[] args)
     {
         Console.WriteLine("C# Combinations Calculator");
-        Console.WriteLine("=" * 30);
+        Console.WriteLine(new string('=', 30));
         Console.WriteLine($"factorial(5) = {Factorial(5)}");
         Console.WriteLine($"combinations(5, 2) = {Combinations(5, 2)}");
         Console.WriteLine($"combinations(10, 3) = {Combinations(10, 3)}");
@@ -384,40 +424,102 @@ public class Program
 }
 """
 
-        csharp_file_id = await upload_file("combinations.cs", csharp_file_content, "csharp")
+
+async def run_demo(client: httpx.AsyncClient) -> None:
+    """Run every demo step over the shared HTTP client."""
+    logger.info("🎉 MCP Docker Executor - Comprehensive Feature Demo")
+    logger.info("=" * 60)
+
+    try:
+        # 1. Create base image with all languages
+        base_image_id = await create_image(client, ["python", "node", "csharp"])
+
+        # 2. Install a package per language and run code that uses it; the
+        # three chains are independent, so they run concurrently
+        logger.info("\n📦 Package Management (Python: requests, Node.js: lodash, C#: Newtonsoft.Json)")
+        logger.info("-" * 30)
+
+        poller = ExecutionPoller(client)
+
+        async def package_chain(language: str, package_name: str, code: str, expected_output: str) -> str:
+            image_id = await install_package(client, base_image_id, language, package_name)
+            await execute_code(client, poller, image_id, language, code, expected_output)
+            return image_id
+
+        python_image_id, node_image_id, csharp_image_id = await asyncio.gather(
+            package_chain("python", "requests", PYTHON_CODE, "Requests library"),
+            package_chain("node", "lodash", NODE_CODE, "Lodash library"),
+            package_chain("csharp", "Newtonsoft.Json", CSHARP_CODE, "Newtonsoft.Json"),
+        )
+
+        # 3. Test file management
+        logger.info("\n📁 File Management")
+        logger.info("-" * 30)
+
+        python_file_id, node_file_id, csharp_file_id = await upload_files_batch(
+            client,
+            [
+                ("combinations.py", PYTHON_FILE_CONTENT, "python"),
+                ("combinations.js", NODE_FILE_CONTENT, "node"),
+                ("combinations.cs", CSHARP_FILE_CONTENT, "csharp"),
+            ],
+        )
 
         # List files
-        await list_files()
+        await list_files(client)
 
         # Execute uploaded files
-        print("\n🎯 Executing Uploaded Files")
-        print("-" * 30)
-
-        await execute_file(python_file_id, python_image_id)
-        await execute_file(node_file_id, node_image_id)
-        await execute_file(csharp_file_id, csharp_image_id)
+        logger.info("\n🎯 Executing Uploaded Files")
+        logger.info("-" * 30)
+
+        await execute_files_batch(
+            client,
+            [
+                (python_file_id, python_image_id),
+                (node_file_id, node_image_id),
+                (csharp_file_id, csharp_image_id),
+            ],
+        )
 
         # Get file statistics
-        await get_file_stats()
+        await get_file_stats(client)
 
         # Cleanup files
-        print("\n🧹 Cleanup")
-        print("-" * 30)
+        logger.info("\n🧹 Cleanup")
+        logger.info("-" * 30)
 
-        await delete_file(python_file_id)
-        await delete_file(node_file_id)
-        await delete_file(csharp_file_id)
+        await delete_files_batch(client, [python_file_id, node_file_id, csharp_file_id])
 
         # Final statistics
-        await get_file_stats()
+        await get_file_stats(client)
 
-        print("\n🎉 Demo completed successfully!")
-        print("=" * 60)
+        logger.info("\n🎉 Demo completed successfully!")
+        logger.info("=" * 60)
 
     except Exception as e:
-        print(f"\n❌ Demo failed: {e}")
+        logger.error(f"\n❌ Demo failed: {e}")
         raise
 
 
+async def main():
+    """Main demonstration function."""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    limits = httpx.Limits(max_keepalive_connections=50, max_connections=100)
+    async with httpx.AsyncClient(http2=True, timeout=300.0, limits=limits) as client:
+        await run_demo(client)
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        loop_factory = None
+    else:
+        loop_factory = uvloop.new_event_loop
+
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())
@@ -4,12 +4,43 @@ Command-line interface for MCP Docker Executor.
 
 import argparse
 import asyncio
+import functools
+import gzip
+import logging
+import os
 import sys
-from typing import Any
+import time
+from typing import TYPE_CHECKING, Any
 
-import httpx
+import orjson
 
-from .models import Language
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Polling backs off exponentially so short executions are picked up quickly
+POLL_INITIAL_DELAY = 0.05
+POLL_MAX_DELAY = 2.0
+POLL_BACKOFF = 1.7
+POLL_TIMEOUT = 120.0
+# The server holds each wait request open for up to this many seconds
+LONG_POLL_TIMEOUT = 30.0
+# How long a successful health check is reused before asking the server again
+HEALTH_CACHE_TTL = 5.0
+# Request bodies are serialized with orjson rather than httpx's stdlib json encoder
+JSON_HEADERS = {"content-type": "application/json"}
+# Bodies at least this large (code, file contents) are gzip-compressed before sending
+GZIP_MIN_SIZE = 1024
+GZIP_JSON_HEADERS = {**JSON_HEADERS, "content-encoding": "gzip"}
+# Cap on concurrent requests that make the server call Docker (image builds, installs, runs)
+MAX_INFLIGHT = int(os.environ.get("MCP_EXECUTOR_MAX_INFLIGHT", "8"))
+
+
+def _ok(response: "httpx.Response") -> Any:
+    """Raise on an HTTP error status, otherwise return the orjson-decoded body."""
+    response.raise_for_status()
+    return orjson.loads(response.content)
 
 
 class MCPCLI:
@@ -18,43 +49,118 @@ class MCPCLI:
     def __init__(self, base_url: str = "http://localhost:8000"):
         """Initialize the CLI."""
         self.base_url = base_url
+        self._client: httpx.AsyncClient | None = None
+        self._health_cached: tuple[float, bool] | None = None
+        self._image_cache: dict[tuple[frozenset[str], str | None], dict[str, Any]] = {}
+        self._image_lock = asyncio.Lock()
+        self._inflight = asyncio.Semaphore(MAX_INFLIGHT)
+
+    async def __aenter__(self) -> "MCPCLI":
+        """Open the pooled HTTP client shared by every request."""
+        import httpx
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=True,
+            timeout=300.0,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """Return the shared HTTP client."""
+        if self._client is None:
+            raise RuntimeError("MCPCLI must be used as an async context manager")
+        return self._client
+
+    async def _post(self, url: str, payload: Any) -> "httpx.Response":
+        """POST an orjson-encoded JSON body, gzip-compressed when it is large."""
+        body = orjson.dumps(payload)
+        headers = JSON_HEADERS
+        if len(body) >= GZIP_MIN_SIZE:
+            body = gzip.compress(body, compresslevel=1)
+            headers = GZIP_JSON_HEADERS
+
+        async with self._inflight:
+            return await self.client.post(url, content=body, headers=headers)
 
     async def health_check(self) -> bool:
-        """Check if the server is healthy."""
+        """Check if the server is healthy, reusing a recent result."""
+        now = time.monotonic()
+        if self._health_cached is not None and now - self._health_cached[0] < HEALTH_CACHE_TTL:
+            return self._health_cached[1]
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/health")
-                return response.status_code == 200
+            response = await self.client.get("/health")
+            healthy = response.status_code == 200
         except Exception:
-            return False
+            healthy = False
+
+        if healthy:
+            self._health_cached = (now, healthy)
+        return healthy
 
     async def create_image(self, languages: list[str], image_name: str | None = None) -> dict[str, Any]:
-        """Create a new Docker image."""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/images/create",
-                json={
+        """Create a new Docker image, reusing one already built for the same languages and name."""
+        key = (frozenset(languages), image_name)
+        async with self._image_lock:
+            if key in self._image_cache:
+                return self._image_cache[key]
+
+            response = await self._post(
+                "/images/create",
+                {
                     "languages": languages,
                     "image_name": image_name,
                     "requirements": {},
                 },
             )
-            return response.json()
+            result = _ok(response)
+            if result.get("success"):
+                self._image_cache[key] = result
+
+            return result
 
     async def execute_code(self, language: str, code: str, image_id: str | None = None) -> dict[str, Any]:
         """Execute code in a container."""
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{self.base_url}/execute",
-                json={"language": language, "code": code, "image_id": image_id},
-            )
-            return response.json()
+        response = await self._post(
+            "/execute",
+            {"language": language, "code": code, "image_id": image_id},
+        )
+        return _ok(response)
 
     async def get_execution_result(self, execution_id: str) -> dict:
         """Get execution result."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.base_url}/executions/{execution_id}")
-            return response.json()
+        response = await self.client.get(f"/executions/{execution_id}")
+        return _ok(response)
+
+    async def wait_for_execution(self, execution_id: str) -> dict[str, Any] | None:
+        """Wait for an execution to complete or fail; return None on timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + POLL_TIMEOUT
+        delay = POLL_INITIAL_DELAY
+
+        # Check straight away: short runs are often finished before the first poll
+        while True:
+            remaining = max(deadline - loop.time(), 0.0)
+            response = await self.client.get(
+                f"/executions/{execution_id}/wait",
+                params={"timeout": min(LONG_POLL_TIMEOUT, remaining)},
+            )
+            status_result = _ok(response)
+            if status_result["status"] in ("completed", "failed"):
+                return status_result
+            if loop.time() >= deadline:
+                return None
+            await asyncio.sleep(delay)
+            delay = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
 
     async def install_package(
         self,
@@ -64,51 +170,52 @@ class MCPCLI:
         build_new_image: bool = True,
     ) -> dict[str, Any]:
         """Install a package."""
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            response = await client.post(
-                f"{self.base_url}/packages/install",
-                json={
-                    "image_id": image_id,
-                    "language": language,
-                    "package_name": package_name,
-                    "build_new_image": build_new_image,
-                },
-            )
-            return response.json()
+        response = await self._post(
+            "/packages/install",
+            {
+                "image_id": image_id,
+                "language": language,
+                "package_name": package_name,
+                "build_new_image": build_new_image,
+            },
+        )
+        return _ok(response)
 
     async def upload_file(self, filename: str, content: str, language: str) -> dict:
         """Upload a file for execution."""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/files/upload",
-                json={"filename": filename, "content": content, "language": language},
-            )
-            return response.json()
+        response = await self.client.post(
+            "/files/upload",
+            data={"filename": filename, "language": language},
+            files={"content": (filename, content.encode())},
+        )
+        return _ok(response)
 
     async def list_files(self) -> dict:
         """List uploaded files."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.base_url}/files")
-            return response.json()
+        response = await self.client.get("/files")
+        return _ok(response)
 
     async def delete_file(self, file_id: str) -> dict:
         """Delete an uploaded file."""
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(f"{self.base_url}/files/{file_id}")
-            return response.json()
+        response = await self.client.delete(f"/files/{file_id}")
+        return _ok(response)
 
     async def execute_file(self, file_id: str, image_id: str | None = None) -> dict:
         """Execute an uploaded file."""
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{self.base_url}/files/{file_id}/execute",
-                json={"file_id": file_id, "image_id": image_id},
-            )
-            return response.json()
+        response = await self._post(
+            f"/files/{file_id}/execute",
+            {"file_id": file_id, "image_id": image_id},
+        )
+        return _ok(response)
 
 
-async def main():
-    """Main CLI function."""
+@functools.lru_cache(maxsize=1)
+def build_parser() -> argparse.ArgumentParser:
+    """Build the CLI argument parser once per process."""
+    from .models import Language
+
+    language_choices = tuple(lang.value for lang in Language)
+
     parser = argparse.ArgumentParser(description="MCP Docker Executor CLI")
     parser.add_argument(
         "--base-url",
@@ -126,7 +233,7 @@ async def main():
     create_parser.add_argument(
         "languages",
         nargs="+",
-        choices=[lang.value for lang in Language],
+        choices=language_choices,
         help="Languages to include",
     )
     create_parser.add_argument("--image-name", help="Custom image name")
@@ -135,7 +242,7 @@ async def main():
     exec_parser = subparsers.add_parser("exec", help="Execute code")
     exec_parser.add_argument(
         "language",
-        choices=[lang.value for lang in Language],
+        choices=language_choices,
         help="Programming language",
     )
     exec_parser.add_argument("code", help="Code to execute")
@@ -150,7 +257,7 @@ async def main():
     install_parser.add_argument("image_id", help="Docker image ID")
     install_parser.add_argument(
         "language",
-        choices=[lang.value for lang in Language],
+        choices=language_choices,
         help="Programming language",
     )
     install_parser.add_argument("package_name", help="Package name to install")
@@ -167,7 +274,7 @@ async def main():
     upload_parser.add_argument("content", help="File content")
     upload_parser.add_argument(
         "language",
-        choices=[lang.value for lang in Language],
+        choices=language_choices,
         help="Programming language",
     )
 
@@ -183,140 +290,153 @@ async def main():
     exec_file_parser.add_argument("file_id", help="File ID to execute")
     exec_file_parser.add_argument("--image-id", help="Docker image ID to use")
 
+    return parser
+
+
+async def main():
+    """Main CLI function."""
+    parser = build_parser()
     args = parser.parse_args()
 
+    # Command output is written through logging with bare messages, like print()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
     if not args.command:
         parser.print_help()
         return
 
-    cli = MCPCLI(args.base_url)
-
     try:
-        if args.command == "health":
-            if await cli.health_check():
-                print("✅ Server is healthy")
-            else:
-                print("❌ Server is not healthy")
-                sys.exit(1)
-
-        elif args.command == "create":
-            result = await cli.create_image(args.languages, args.image_name)
-            if result["success"]:
-                print("✅ Image created successfully!")
-                print(f"Image ID: {result['image_id']}")
-                print(f"Image Name: {result['image_name']}")
-            else:
-                print(f"❌ Image creation failed: {result['error_message']}")
-                sys.exit(1)
-
-        elif args.command == "exec":
-            result = await cli.execute_code(args.language, args.code, args.image_id)
-            if result["status"] == "running":
-                execution_id = result["execution_id"]
-                print(f"🔄 Execution started: {execution_id}")
-
-                # Wait for completion
-                for _i in range(60):
-                    await asyncio.sleep(1)
-                    status_result = await cli.get_execution_result(execution_id)
-                    if status_result["status"] == "completed":
-                        print("✅ Execution completed!")
-                        if status_result.get("stdout"):
-                            print(f"Output:\n{status_result['stdout']}")
-                        if status_result.get("stderr"):
-                            print(f"Errors:\n{status_result['stderr']}")
-                        break
-                    elif status_result["status"] == "failed":
-                        error_msg = status_result.get("error_message", "Unknown error")
-                        print(f"❌ Execution failed: {error_msg}")
-                        sys.exit(1)
+        async with MCPCLI(args.base_url) as cli:
+            if args.command == "health":
+                if await cli.health_check():
+                    logger.info("✅ Server is healthy")
                 else:
-                    print("⏰ Execution timed out")
+                    logger.error("❌ Server is not healthy")
                     sys.exit(1)
-            else:
-                error_msg = result.get("error_message", "Unknown error")
-                print(f"❌ Execution failed to start: {error_msg}")
-                sys.exit(1)
-
-        elif args.command == "result":
-            result = await cli.get_execution_result(args.execution_id)
-            print(f"Status: {result['status']}")
-            if result.get("stdout"):
-                print(f"Output:\n{result['stdout']}")
-            if result.get("stderr"):
-                print(f"Errors:\n{result['stderr']}")
-            if result.get("exit_code") is not None:
-                print(f"Exit Code: {result['exit_code']}")
-
-        elif args.command == "install-package":
-            result = await cli.install_package(args.image_id, args.language, args.package_name, args.build_new_image)
-            if result["success"]:
-                print("✅ Package installed successfully!")
-                if result.get("new_image_id"):
-                    print(f"New Image ID: {result['new_image_id']}")
-            else:
-                print(f"❌ Package installation failed: {result['error_message']}")
-                sys.exit(1)
-
-        elif args.command == "upload-file":
-            result = await cli.upload_file(args.filename, args.content, args.language)
-            if result["success"]:
-                print("✅ File uploaded successfully!")
-                print(f"File ID: {result['file_id']}")
-            else:
-                print(f"❌ File upload failed: {result['error_message']}")
-                sys.exit(1)
-
-        elif args.command == "list-files":
-            result = await cli.list_files()
-            print(f"Total files: {result['total_count']}")
-            for file_info in result["files"]:
-                file_id = file_info["file_id"]
-                filename = file_info["filename"]
-                language = file_info["language"]
-                print(f"- {filename} ({language}) - {file_id}")
-
-        elif args.command == "delete-file":
-            result = await cli.delete_file(args.file_id)
-            if result["success"]:
-                print("✅ File deleted successfully!")
-            else:
-                print(f"❌ File deletion failed: {result.get('detail', 'Unknown error')}")
-                sys.exit(1)
-
-        elif args.command == "exec-file":
-            result = await cli.execute_file(args.file_id, args.image_id)
-            if result["status"] == "running":
-                execution_id = result["execution_id"]
-                print(f"🔄 Execution started: {execution_id}")
-
-                # Wait for completion
-                for _i in range(60):
-                    await asyncio.sleep(1)
-                    status_result = await cli.get_execution_result(execution_id)
-                    if status_result["status"] == "completed":
-                        print("✅ Execution completed!")
-                        if status_result.get("stdout"):
-                            print(f"Output:\n{status_result['stdout']}")
-                        if status_result.get("stderr"):
-                            print(f"Errors:\n{status_result['stderr']}")
-                        break
-                    elif status_result["status"] == "failed":
-                        error_msg = status_result.get("error_message", "Unknown error")
-                        print(f"❌ Execution failed: {error_msg}")
-                        sys.exit(1)
+
+            elif args.command == "create":
+                result = await cli.create_image(args.languages, args.image_name)
+                if result["success"]:
+                    logger.info("✅ Image created successfully!")
+                    logger.info(f"Image ID: {result['image_id']}")
+                    logger.info(f"Image Name: {result['image_name']}")
                 else:
-                    print("⏰ Execution timed out")
+                    logger.error(f"❌ Image creation failed: {result['error_message']}")
+                    sys.exit(1)
+
+            elif args.command == "exec":
+                status_result = await cli.execute_code(args.language, args.code, args.image_id)
+                # Short runs come back finished; only poll while the server reports them in progress
+                if status_result["status"] in ("pending", "running"):
+                    execution_id = status_result["execution_id"]
+                    logger.info(f"🔄 Execution started: {execution_id}")
+                    status_result = await cli.wait_for_execution(execution_id)
+
+                if status_result is None:
+                    logger.warning("⏰ Execution timed out")
+                    sys.exit(1)
+                elif status_result["status"] == "completed":
+                    logger.info("✅ Execution completed!")
+                    if status_result.get("stdout"):
+                        logger.info(f"Output:\n{status_result['stdout']}")
+                    if status_result.get("stderr"):
+                        logger.info(f"Errors:\n{status_result['stderr']}")
+                else:
+                    error_msg = status_result.get("error_message", "Unknown error")
+                    logger.error(f"❌ Execution failed: {error_msg}")
+                    sys.exit(1)
+
+            elif args.command == "result":
+                result = await cli.get_execution_result(args.execution_id)
+                logger.info(f"Status: {result['status']}")
+                if result.get("stdout"):
+                    logger.info(f"Output:\n{result['stdout']}")
+                if result.get("stderr"):
+                    logger.info(f"Errors:\n{result['stderr']}")
+                if result.get("exit_code") is not None:
+                    logger.info(f"Exit Code: {result['exit_code']}")
+
+            elif args.command == "install-package":
+                result = await cli.install_package(
+                    args.image_id, args.language, args.package_name, args.build_new_image
+                )
+                if result["success"]:
+                    logger.info("✅ Package installed successfully!")
+                    if result.get("new_image_id"):
+                        logger.info(f"New Image ID: {result['new_image_id']}")
+                else:
+                    logger.error(f"❌ Package installation failed: {result['error_message']}")
+                    sys.exit(1)
+
+            elif args.command == "upload-file":
+                result = await cli.upload_file(args.filename, args.content, args.language)
+                if result["success"]:
+                    logger.info("✅ File uploaded successfully!")
+                    logger.info(f"File ID: {result['file_id']}")
+                else:
+                    logger.error(f"❌ File upload failed: {result['error_message']}")
+                    sys.exit(1)
+
+            elif args.command == "list-files":
+                result = await cli.list_files()
+                logger.info(f"Total files: {result['total_count']}")
+                for file_info in result["files"]:
+                    file_id = file_info["file_id"]
+                    filename = file_info["filename"]
+                    language = file_info["language"]
+                    logger.info(f"- {filename} ({language}) - {file_id}")
+
+            elif args.command == "delete-file":
+                result = await cli.delete_file(args.file_id)
+                if result["success"]:
+                    logger.info("✅ File deleted successfully!")
+                else:
+                    logger.error(f"❌ File deletion failed: {result.get('detail', 'Unknown error')}")
+                    sys.exit(1)
+
+            elif args.command == "exec-file":
+                status_result = await cli.execute_file(args.file_id, args.image_id)
+                # Short runs come back finished; only poll while the server reports them in progress
+                if status_result["status"] in ("pending", "running"):
+                    execution_id = status_result["execution_id"]
+                    logger.info(f"🔄 Execution started: {execution_id}")
+                    status_result = await cli.wait_for_execution(execution_id)
+
+                if status_result is None:
+                    logger.warning("⏰ Execution timed out")
+                    sys.exit(1)
+                elif status_result["status"] == "completed":
+                    logger.info("✅ Execution completed!")
+                    if status_result.get("stdout"):
+                        logger.info(f"Output:\n{status_result['stdout']}")
+                    if status_result.get("stderr"):
+                        logger.info(f"Errors:\n{status_result['stderr']}")
+                else:
+                    error_msg = status_result.get("error_message", "Unknown error")
+                    logger.error(f"❌ Execution failed: {error_msg}")
                     sys.exit(1)
-            else:
-                error_msg = result.get("error_message", "Unknown error")
-                print(f"❌ Execution failed to start: {error_msg}")
-                sys.exit(1)
 
     except Exception as e:
-        print(f"❌ Error: {e}")
+        logger.error(f"❌ Error: {e}")
         sys.exit(1)
 
 
+def run() -> None:
+    """Run the CLI, on uvloop when it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        loop_factory = None
+    else:
+        loop_factory = uvloop.new_event_loop
+
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
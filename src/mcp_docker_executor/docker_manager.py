@@ -3,17 +3,23 @@ Docker manager for MCP Docker Executor.
 """
 
 import asyncio
-import base64
+import io
 import json
 import logging
 import os
 import re
-import tempfile
+import secrets
+import tarfile
 import time
+from collections import OrderedDict, deque
+from itertools import islice
+from pathlib import Path
 from typing import Any
 
 import docker
-from docker.errors import DockerException
+from docker.errors import BuildError, DockerException, ImageNotFound
+from docker.models.containers import Container
+from docker.models.images import Image
 
 from .file_manager import FileManager
 from .models import (
@@ -34,41 +40,240 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
+# Number of successful image builds remembered per distinct create request
+IMAGE_CACHE_SIZE = 256
+# Keep-alive connections to the Docker daemon shared by concurrent requests
+DOCKER_MAX_POOL_SIZE = 32
+# Idle warm containers kept per (image, working directory, resource limits)
+CONTAINER_POOL_SIZE = 4
+# Seconds an idle warm container is kept before it is removed
+CONTAINER_IDLE_TIMEOUT = 60.0
+# Label marking warm containers, which are shared between executions and never used as install targets
+WARM_CONTAINER_LABEL = "mcp-docker-executor.warm"
+DEFAULT_IMAGE = "mcp-executor-test:latest"
+# Seconds the image count reported by /health is reused before asking the daemon again
+IMAGE_COUNT_TTL = 5.0
+# Seconds a successful daemon ping is trusted by health_check before pinging again
+HEALTH_CHECK_TTL = 5.0
+
+# Log lines kept per streaming execution; older lines are dropped
+STREAM_LOG_SIZE = 10_000
+# Seconds a finished streaming execution stays queryable before it is forgotten
+STREAM_RESULT_TTL = 600.0
+
+# Runs of characters that can't appear in an image tag derived from a package name
+_PKG_SANITIZE = re.compile(r"[^a-z0-9]+")
+
+# Static parts of the generated Dockerfile; only the language fragments vary per request
+_DOCKERFILE_HEADER_TEMPLATE = """FROM {base_os}
+
+# Install system dependencies
+RUN apt-get update && apt-get install -y \\
+    curl \\
+    git \\
+    build-essential \\
+    wget \\
+    gnupg \\
+    libicu-dev \\
+    libssl-dev \\
+    && rm -rf /var/lib/apt/lists/*
+"""
+
+_DOCKERFILE_NODE_FRAGMENT = """# Install Node.js
+RUN curl -fsSL https://deb.nodesource.com/setup_22.x | bash - \\
+    && apt-get install -y nodejs \\
+    && node --version \\
+    && npm --version
+"""
+
+_DOCKERFILE_DOTNET_FRAGMENT = """# Install .NET SDK
+RUN wget https://packages.microsoft.com/config/ubuntu/22.04/\\
+    packages-microsoft-prod.deb \\
+    -O packages-microsoft-prod.deb && \\
+    dpkg -i packages-microsoft-prod.deb && \\
+    rm packages-microsoft-prod.deb && \\
+    apt-get update && \\
+    apt-get install -y dotnet-sdk-8.0 && \\
+    dotnet --version
+
+# Pre-restored console project that C# executions copy instead of running dotnet new
+RUN mkdir /opt/csharp-template && cd /opt/csharp-template && \\
+    dotnet new console --force && \\
+    dotnet restore
+"""
+
+_DOCKERFILE_FOOTER = """# Create workspace and user
+RUN useradd -ms /bin/bash sandboxuser
+RUN mkdir -p /workspace && chown sandboxuser:sandboxuser /workspace
+USER sandboxuser
+WORKDIR /workspace
+
+# Default command
+CMD ["/bin/bash"]"""
+
+# Runs /tmp/csharp_exec_{run_id}.cs as the Program.cs of a copy of the image's pre-restored template project,
+# falling back to a fresh console project on images built without /opt/csharp-template
+_CSHARP_COMMAND_TEMPLATE = (
+    "if [ -d /opt/csharp-template ]; then "
+    "cp -rT /opt/csharp-template /tmp/csharp_exec_{run_id} && restore=--no-restore; "
+    "else "
+    "mkdir -p /tmp/csharp_exec_{run_id} && (cd /tmp/csharp_exec_{run_id} && dotnet new console --force) && restore=; "
+    "fi && "
+    "cd /tmp/csharp_exec_{run_id} && "
+    "mv /tmp/csharp_exec_{run_id}.cs Program.cs && "
+    "dotnet run $restore"
+)
+
+# Run in warm containers by the reaper; executions leave their files in /tmp instead of removing them
+_TMP_SWEEP_COMMAND = ["find", "/tmp", "-mindepth", "1", "-mmin", "+5", "-delete"]
+
+
+def _run_id() -> str:
+    """Return a name for one execution's files, unique even for runs started in the same second."""
+    return f"{int(time.time())}_{secrets.token_hex(4)}"
+
+
+def _tar_archive(files: dict[str, bytes]) -> bytes:
+    """Pack name -> content pairs into an in-memory tar archive for put_archive."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.mode = 0o644
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+# Compact JSON for server-sent event payloads
+_encode_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
 
 class DockerManager:
     """Manages Docker operations for the MCP server."""
 
     def __init__(self, client=None):
         """Initialize the Docker manager."""
-        self.client = client or docker.from_env()
+        self.client = client or docker.from_env(max_pool_size=DOCKER_MAX_POOL_SIZE)
         self.active_containers: dict[str, Any] = {}
         self.streaming_executions: dict[str, dict] = {}
         self.file_manager = FileManager()
+        self._image_cache: OrderedDict[tuple, CreateImageResponse] = OrderedDict()
+        self._last_built_tag: str | None = None
+        # ((path, mtime_ns), content) of the last project Dockerfile read
+        self._project_dockerfile: tuple[tuple[str, int], str] | None = None
+        # Idle containers per pool key as (idle since, container), most recently used last
+        self._container_pool: dict[tuple, list[tuple[float, Container]]] = {}
+        self._reaper: asyncio.Task[None] | None = None
+        self._streaming_sweeper: asyncio.Task[None] | None = None
+        self._cleanup_tasks: set[asyncio.Task[None]] = set()
+        # (monotonic time fetched, count) of the last image listing
+        self._image_count_cache: tuple[float, int] | None = None
+        # Monotonic time of the last successful ping, cleared when a Docker call fails
+        self._healthy_at: float | None = None
 
         # Test Docker connection
         try:
             self.client.ping()
+            self._healthy_at = time.monotonic()
             logger.info("Docker connection established successfully")
         except DockerException as e:
             logger.exception("Failed to connect to Docker")
             raise
 
+    def close(self) -> None:
+        """Remove warm containers and close the pooled connections to the Docker daemon."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        if self._streaming_sweeper is not None:
+            self._streaming_sweeper.cancel()
+            self._streaming_sweeper = None
+
+        self.drain_container_pool()
+        self.file_manager.close()
+        self.client.close()
+
+    def drain_container_pool(self) -> None:
+        """Remove every idle warm container, e.g. before deleting the images they run."""
+        for idle in self._container_pool.values():
+            for _, container in idle:
+                self._remove_container(container)
+        self._container_pool.clear()
+
     async def health_check(self) -> bool:
         """Check if Docker is healthy."""
-        try:
-            self.client.ping()
+        if self._healthy_at is not None and time.monotonic() - self._healthy_at < HEALTH_CHECK_TTL:
             return True
+
+        try:
+            await asyncio.to_thread(self.client.ping)
         except DockerException:
+            self._healthy_at = None
             return False
 
+        self._healthy_at = time.monotonic()
+        return True
+
+    async def cached_image_count(self, ttl: float = IMAGE_COUNT_TTL) -> int:
+        """Return the number of local images, listing them at most once per ttl seconds."""
+        now = time.monotonic()
+        if self._image_count_cache is None or now - self._image_count_cache[0] > ttl:
+            images = await asyncio.to_thread(self.client.api.images, quiet=True)
+            self._image_count_cache = (now, len(images))
+        return self._image_count_cache[1]
+
+    def _image_cache_key(self, request: CreateImageRequest) -> tuple:
+        """Return a key that is equal for create requests describing the same image."""
+        # The project Dockerfile takes precedence over the request, so an edit to it must miss the cache
+        return (
+            self._project_dockerfile_version(),
+            tuple(sorted(language.value for language in request.languages)),
+            tuple(sorted(request.requirements.items())),
+            request.image_name,
+            request.custom_dockerfile,
+            request.base_os,
+            tuple(sorted(request.labels.items())),
+        )
+
+    async def _cached_image(self, key: tuple) -> CreateImageResponse | None:
+        """Return the cached build for key if its image still exists."""
+        cached = self._image_cache.get(key)
+        if cached is None or cached.image_id is None:
+            return None
+
+        try:
+            await asyncio.to_thread(self.client.images.get, cached.image_id)
+        except ImageNotFound:
+            del self._image_cache[key]
+            return None
+
+        self._image_cache.move_to_end(key)
+        return cached.model_copy(update={"cached": True})
+
     async def create_image(self, request: CreateImageRequest) -> CreateImageResponse:
         """Create a new Docker image with specified languages and requirements."""
+        key = self._image_cache_key(request)
+        cached = None if request.force_rebuild else await self._cached_image(key)
+        if cached is not None:
+            logger.info(f"Reusing cached image {cached.image_name}")
+            return cached
+
+        response = await self._build_image(request)
+        if response.success:
+            self._image_cache[key] = response
+            if len(self._image_cache) > IMAGE_CACHE_SIZE:
+                self._image_cache.popitem(last=False)
+
+        return response
+
+    async def _build_image(self, request: CreateImageRequest) -> CreateImageResponse:
+        """Build a Docker image for the request."""
         try:
             # Always use the project's Dockerfile if it exists
-            dockerfile_path = os.path.join(os.getcwd(), "Dockerfile")
-            if os.path.exists(dockerfile_path):
-                with open(dockerfile_path) as f:
-                    dockerfile_content = f.read()
+            dockerfile_content = self._read_project_dockerfile()
+            if dockerfile_content is not None:
                 logger.info("Using project's Dockerfile")
             elif request.custom_dockerfile:
                 dockerfile_content = request.custom_dockerfile
@@ -78,225 +283,305 @@ class DockerManager:
                 dockerfile_content = self._generate_dockerfile(request)
                 logger.info("Using generated Dockerfile")
 
-            # Create temporary directory for build context
-            with tempfile.TemporaryDirectory() as temp_dir:
-                dockerfile_path = os.path.join(temp_dir, "Dockerfile")
-                with open(dockerfile_path, "w") as f:
-                    f.write(dockerfile_content)
-
-                # Generate image name
-                image_name = request.image_name or f"mcp-executor-{int(time.time())}"
-                tag = f"{image_name}:latest"
-
-                # Build image
-                build_logs = []
-                try:
-                    image, build_logs = self.client.images.build(
-                        path=temp_dir, tag=tag, rm=True, forcerm=True, nocache=True
-                    )
-
-                    return CreateImageResponse(
-                        image_id=image.id,
-                        image_name=image_name,
-                        build_logs=[
-                            str(log.get("stream", "")) if isinstance(log, dict) and "stream" in log else str(log)
-                            for log in build_logs
-                        ],
-                        success=True,
-                    )
-
-                except Exception as e:
-                    logger.exception("Failed to build image")
-                    return CreateImageResponse(
-                        success=False,
-                        error_message=f"Build failed: {e!s}",
-                        build_logs=[
-                            str(log.get("stream", "")) if isinstance(log, dict) and "stream" in log else str(log)
-                            for log in build_logs
-                        ],
-                    )
+            # Generate image name
+            image_name = request.image_name or f"mcp-executor-{int(time.time())}"
+            tag = f"{image_name}:latest"
+
+            # Build image
+            build_logs: list[str] = []
+            try:
+                # Reuse cached layers (apt, toolchains) unless a clean rebuild is requested; earlier
+                # builds of this tag, the most recent build and any requested images are extra cache sources
+                cache_from = list(dict.fromkeys([tag, self._last_built_tag or tag, *request.cache_from, DEFAULT_IMAGE]))
+                # Build off the event loop so concurrent create requests build in parallel
+                image = await asyncio.to_thread(
+                    self._stream_build,
+                    dockerfile_content,
+                    tag,
+                    build_logs,
+                    nocache=request.force_rebuild,
+                    cache_from=cache_from,
+                    labels=request.labels or None,
+                )
+                self._last_built_tag = tag
+                self._image_count_cache = None
+
+                return CreateImageResponse(
+                    image_id=image.id,
+                    image_name=image_name,
+                    build_logs=build_logs,
+                    success=True,
+                )
+
+            except Exception as e:
+                logger.exception("Failed to build image")
+                return CreateImageResponse(
+                    success=False,
+                    error_message=f"Build failed: {e!s}",
+                    build_logs=build_logs,
+                )
 
         except Exception as e:
             logger.exception("Error creating image")
             return CreateImageResponse(success=False, error_message=str(e))
 
+    def _stream_build(self, dockerfile: str, tag: str, build_logs: list[str], **kwargs: Any) -> Image:
+        """Build tag from an in-memory Dockerfile, appending its log lines to build_logs as they arrive."""
+        # Raw build output, handed to BuildError in the shape docker-py's own builds give it
+        chunks: list[dict[str, str]] = []
+        for chunk in self.client.api.build(
+            fileobj=io.BytesIO(dockerfile.encode()), tag=tag, rm=True, forcerm=True, decode=True, **kwargs
+        ):
+            chunks.append(chunk)
+            if "error" in chunk:
+                raise BuildError(chunk["error"], iter(chunks))
+            if "stream" in chunk:
+                build_logs.append(chunk["stream"])
+
+        return self.client.images.get(tag)
+
     def _generate_dockerfile(self, request: CreateImageRequest) -> str:
         """Generate a Dockerfile based on the request."""
-        dockerfile_lines = [
-            f"FROM {request.base_os}",
-            "",
-            "# Cache busting",
-            f"RUN echo 'Cache bust: {int(time.time())}' > /tmp/cache_bust.txt",
-            f"RUN echo 'Build time: {int(time.time())}' > /tmp/build_time.txt",
-            "",
-        ]
-
-        # Add system dependencies
-        dockerfile_lines.extend(
-            [
-                "# Install system dependencies",
-                "RUN apt-get update && apt-get install -y \\",
-                "    curl \\",
-                "    git \\",
-                "    build-essential \\",
-                "    wget \\",
-                "    gnupg \\",
-                "    libicu-dev \\",
-                "    libssl-dev \\",
-                "    && rm -rf /var/lib/apt/lists/*",
-                "",
-            ]
-        )
-
-        # Add language-specific installations
+        fragments = [_DOCKERFILE_HEADER_TEMPLATE.format(base_os=request.base_os)]
         if Language.NODE in request.languages:
-            dockerfile_lines.extend(
-                [
-                    "# Install Node.js",
-                    "RUN curl -fsSL https://deb.nodesource.com/setup_22.x | bash - \\",
-                    "    && apt-get install -y nodejs \\",
-                    "    && node --version \\",
-                    "    && npm --version",
-                    "",
-                ]
-            )
-
+            fragments.append(_DOCKERFILE_NODE_FRAGMENT)
         if Language.CSHARP in request.languages:
-            dockerfile_lines.extend(
-                [
-                    "# Install .NET SDK",
-                    "RUN wget https://packages.microsoft.com/config/ubuntu/22.04/\\",
-                    "    packages-microsoft-prod.deb \\",
-                    "    -O packages-microsoft-prod.deb && \\",
-                    "    dpkg -i packages-microsoft-prod.deb && \\",
-                    "    rm packages-microsoft-prod.deb && \\",
-                    "    apt-get update && \\",
-                    "    apt-get install -y dotnet-sdk-8.0 && \\",
-                    "    dotnet --version",
-                    "",
-                ]
-            )
+            fragments.append(_DOCKERFILE_DOTNET_FRAGMENT)
+        fragments.append(_DOCKERFILE_FOOTER)
 
-        # Add workspace setup
-        dockerfile_lines.extend(
-            [
-                "# Create workspace and user",
-                "RUN useradd -ms /bin/bash sandboxuser",
-                "RUN mkdir -p /workspace && chown sandboxuser:sandboxuser /workspace",
-                "USER sandboxuser",
-                "WORKDIR /workspace",
-                "",
-                "# Default command",
-                'CMD ["/bin/bash"]',
-            ]
-        )
-
-        return "\n".join(dockerfile_lines)
+        return "\n".join(fragments)
 
-    async def execute_code(self, request: ExecuteCodeRequest) -> ExecuteCodeResponse:
-        """Execute code in a Docker container."""
+    @staticmethod
+    def _project_dockerfile_version() -> tuple[str, int] | None:
+        """Return (path, mtime_ns) of the project's Dockerfile in the working directory, or None without one."""
+        dockerfile_path = os.path.join(os.getcwd(), "Dockerfile")
         try:
-            # Prepare execution environment
-            command, temp_file = await self._prepare_code_execution(request)
-
-            # Create and run container
-            container = self.client.containers.create(
-                image=request.image_id or "mcp-executor-test:latest",
-                environment={
-                    "PYTHONUNBUFFERED": "1",
-                    "NODE_ENV": "development",
-                    **request.environment_variables,
-                },
-                working_dir=request.working_directory,
-                mem_limit=f"{request.resource_limits.memory_mb}m",
-                cpu_quota=int(request.resource_limits.cpu_cores * 100000),
-                cpu_period=100000,
-                network_disabled=False,  # Enable network access
-                detach=True,
-                stdin_open=True,
-                tty=True,
-                user="root",  # Use root user for package installation
-            )
-
-            container_id = container.id[:8] if container.id else "unknown"
-            execution_id = f"exec_{int(time.time())}_{container_id}"
-            self.active_containers[execution_id] = container
+            return (dockerfile_path, os.stat(dockerfile_path).st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    def _read_project_dockerfile(self) -> str | None:
+        """Return the project's Dockerfile from the working directory, re-reading it only when it changes."""
+        version = self._project_dockerfile_version()
+        if version is None:
+            return None
+
+        if self._project_dockerfile is None or self._project_dockerfile[0] != version:
+            with open(version[0]) as f:
+                self._project_dockerfile = (version, f.read())
+
+        return self._project_dockerfile[1]
+
+    @staticmethod
+    def _container_pool_key(request: ExecuteCodeRequest | FileExecutionRequest) -> tuple:
+        """Return the key of the warm containers that can run the request."""
+        limits = request.resource_limits
+        return (request.image_id or DEFAULT_IMAGE, request.working_directory, limits.memory_mb, limits.cpu_cores)
+
+    async def _acquire_container(self, key: tuple) -> Container:
+        """Take an idle warm container for key, or create and start a new one."""
+        idle = self._container_pool.get(key)
+        if idle:
+            _, container = idle.pop()
+            return container
+
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_idle_containers())
+
+        return await asyncio.to_thread(self._start_container, key)
+
+    def _start_container(self, key: tuple) -> Container:
+        """Create and start a warm container for key."""
+        image, working_dir, memory_mb, cpu_cores = key
+        container = self.client.containers.create(
+            image=image,
+            command=["tail", "-f", "/dev/null"],
+            environment={
+                "PYTHONUNBUFFERED": "1",
+                "NODE_ENV": "development",
+            },
+            working_dir=working_dir,
+            mem_limit=f"{memory_mb}m",
+            cpu_quota=int(cpu_cores * 100000),
+            cpu_period=100000,
+            network_disabled=False,  # Enable network access
+            detach=True,
+            user="root",  # Use root user for package installation
+            labels={WARM_CONTAINER_LABEL: "1"},
+        )
+        container.start()
+        return container
 
-            # Start container
-            container.start()
+    def _release_container(self, key: tuple, container: Container) -> None:
+        """Return a container to the warm pool, or remove it if the pool is full."""
+        idle = self._container_pool.setdefault(key, [])
+        if len(idle) >= CONTAINER_POOL_SIZE:
+            self._discard_container(container)
+            return
 
-            # Execute command
-            result = container.exec_run(["bash", "-c", command], user="root")
+        idle.append((time.monotonic(), container))
 
-            # Clean up
-            container.stop()
-            container.remove()
-            del self.active_containers[execution_id]
+    def _remove_container(self, container: Container) -> None:
+        """Force-remove a container, logging instead of raising on failure."""
+        try:
+            container.remove(force=True)
+        except DockerException:
+            logger.warning("Failed to remove container %s", container.short_id)
+
+    def _discard_container(self, container: Container) -> None:
+        """Remove a container in the background without delaying the caller."""
+        task = asyncio.create_task(asyncio.to_thread(self._remove_container, container))
+        self._cleanup_tasks.add(task)
+        task.add_done_callback(self._cleanup_tasks.discard)
+
+    async def wait_for_cleanup(self) -> None:
+        """Wait for background container removals to finish."""
+        if self._cleanup_tasks:
+            await asyncio.gather(*self._cleanup_tasks)
+
+    async def _reap_idle_containers(self) -> None:
+        """Periodically remove warm containers that have been idle too long and sweep old files from the rest."""
+        while True:
+            await asyncio.sleep(CONTAINER_IDLE_TIMEOUT / 2)
+            cutoff = time.monotonic() - CONTAINER_IDLE_TIMEOUT
+            for idle in self._container_pool.values():
+                expired = [container for idle_since, container in idle if idle_since < cutoff]
+                idle[:] = [(idle_since, container) for idle_since, container in idle if idle_since >= cutoff]
+                for container in expired:
+                    self._discard_container(container)
+
+            kept = [container for idle in self._container_pool.values() for _, container in idle]
+            await asyncio.gather(*(asyncio.to_thread(self._sweep_tmp, container) for container in kept))
+
+    @staticmethod
+    def _sweep_tmp(container: Container) -> None:
+        """Delete files that earlier executions left in the container's /tmp."""
+        try:
+            container.exec_run(_TMP_SWEEP_COMMAND, user="root")
+        except DockerException:
+            logger.warning("Failed to sweep /tmp in container %s", container.short_id)
 
-            # Parse result
-            stdout = result.output.decode() if result.output else ""
-            stderr = ""
+    async def execute_code(self, request: ExecuteCodeRequest) -> ExecuteCodeResponse:
+        """Execute code in a warm Docker container."""
+        started = time.perf_counter()
+        run_id = _run_id()
+        try:
+            # Prepare execution environment
+            command, archive = await self._prepare_code_execution(request, run_id)
+            return await self._run_program(request, command, archive, run_id, started)
 
+        except Exception as e:
+            logger.exception("Error executing code")
+            if isinstance(e, DockerException):
+                self._healthy_at = None
             return ExecuteCodeResponse(
-                execution_id=execution_id,
-                status=ExecutionStatus.COMPLETED if result.exit_code == 0 else ExecutionStatus.FAILED,
-                stdout=stdout,
-                stderr=stderr,
-                exit_code=result.exit_code,
-                execution_time_seconds=0.0,
+                execution_id=f"exec_{run_id}_error",
+                status=ExecutionStatus.FAILED,
+                error_message=str(e),
             )
 
+    async def _execute_file_bytes(
+        self, request: FileExecutionRequest, language: Language, content: bytes
+    ) -> ExecuteCodeResponse:
+        """Execute a program given as raw bytes, copying it into the container as-is."""
+        started = time.perf_counter()
+        run_id = _run_id()
+        try:
+            command, archive = self._prepare_program(language, content, run_id)
+            return await self._run_program(request, command, archive, run_id, started)
+
         except Exception as e:
-            logger.exception("Error executing code")
+            logger.exception("Error executing file")
+            if isinstance(e, DockerException):
+                self._healthy_at = None
             return ExecuteCodeResponse(
-                execution_id=f"exec_{int(time.time())}_error",
+                execution_id=f"exec_{run_id}_error",
                 status=ExecutionStatus.FAILED,
                 error_message=str(e),
             )
 
-    async def _prepare_code_execution(self, request: ExecuteCodeRequest) -> tuple[str, str | None]:
-        """Prepare the execution environment for code."""
-        if request.language == Language.PYTHON:
-            # Encode the Python code in base64 to avoid shell escaping issues
-            encoded_code = base64.b64encode(request.code.encode()).decode()
-            timestamp = int(time.time())
-            command = (
-                f"echo '{encoded_code}' | base64 -d > /tmp/exec_{timestamp}.py && "
-                f"python3 /tmp/exec_{timestamp}.py && rm /tmp/exec_{timestamp}.py"
-            )
-            return command, None
-
-        elif request.language == Language.NODE:
-            # Encode the Node.js code in base64
-            encoded_code = base64.b64encode(request.code.encode()).decode()
-            timestamp = int(time.time())
-            command = (
-                f"echo '{encoded_code}' | base64 -d > /tmp/exec_{timestamp}.js && "
-                f"node /tmp/exec_{timestamp}.js && rm /tmp/exec_{timestamp}.js"
+    async def _run_program(
+        self,
+        request: ExecuteCodeRequest | FileExecutionRequest,
+        command: str,
+        archive: bytes | None,
+        run_id: str,
+        started: float,
+    ) -> ExecuteCodeResponse:
+        """Copy archive into /tmp of a warm container and run command there."""
+        # Reuse an idle container for the same image and limits when there is one
+        key = self._container_pool_key(request)
+        container = await self._acquire_container(key)
+
+        container_id = container.id[:8] if container.id else "unknown"
+        execution_id = f"exec_{run_id}_{container_id}"
+        self.active_containers[execution_id] = container
+
+        # Copy the program in and execute it
+        try:
+            if archive is not None:
+                await asyncio.to_thread(container.put_archive, "/tmp", archive)
+            result = await asyncio.to_thread(
+                container.exec_run,
+                ["bash", "-c", command],
+                user="root",
+                workdir=request.working_directory,
+                environment=request.environment_variables or None,
+                demux=True,
             )
-            return command, None
-
-        elif request.language == Language.CSHARP:
-            # For C#, create a simple console app and compile/run
-            encoded_code = base64.b64encode(request.code.encode()).decode()
-            command = f"""mkdir -p /tmp/csharp_exec_{int(time.time())} && \\
-cd /tmp/csharp_exec_{int(time.time())} && \\
-echo '{encoded_code}' | base64 -d > Program.cs && \\
-dotnet new console --force && \\
-cp Program.cs Program.cs.bak && \\
-echo '{encoded_code}' | base64 -d > Program.cs && \\
-dotnet run && \\
-cd / && \\
-rm -rf /tmp/csharp_exec_{int(time.time())}"""
-            return command, None
-
-        elif request.language == Language.BASH:
+        except Exception:
+            # The container may be broken; don't hand it out again
+            self._discard_container(container)
+            raise
+        finally:
+            self.active_containers.pop(execution_id, None)
+
+        self._release_container(key, container)
+
+        # Parse result; demux=True yields a (stdout, stderr) pair, either of which may be None
+        output = result.output if isinstance(result.output, tuple) else (None, None)
+        stdout_bytes, stderr_bytes = output
+        stdout = stdout_bytes.decode() if stdout_bytes else ""
+        stderr = stderr_bytes.decode() if stderr_bytes else ""
+
+        return ExecuteCodeResponse(
+            execution_id=execution_id,
+            status=ExecutionStatus.COMPLETED if result.exit_code == 0 else ExecutionStatus.FAILED,
+            stdout=stdout,
+            stderr=stderr,
+            exit_code=result.exit_code,
+            execution_time_seconds=time.perf_counter() - started,
+        )
+
+    async def _prepare_code_execution(self, request: ExecuteCodeRequest, run_id: str) -> tuple[str, bytes | None]:
+        """Prepare the command for code, plus a tar archive of files to place under /tmp first."""
+        if request.language == Language.BASH:
             # For bash, execute directly
-            command = request.code
-            return command, None
+            return request.code, None
+
+        return self._prepare_program(request.language, request.code.encode(), run_id)
+
+    def _prepare_program(self, language: Language, code: bytes, run_id: str) -> tuple[str, bytes]:
+        """Prepare the command that runs a program file, plus the tar archive holding it."""
+        if language == Language.PYTHON:
+            command = f"python3 /tmp/exec_{run_id}.py"
+            return command, _tar_archive({f"exec_{run_id}.py": code})
+
+        elif language == Language.NODE:
+            command = f"node /tmp/exec_{run_id}.js"
+            return command, _tar_archive({f"exec_{run_id}.js": code})
+
+        elif language == Language.CSHARP:
+            # For C#, copy the template console app and replace its Program.cs with the code
+            command = _CSHARP_COMMAND_TEMPLATE.format(run_id=run_id)
+            return command, _tar_archive({f"csharp_exec_{run_id}.cs": code})
+
+        elif language == Language.BASH:
+            command = f"bash /tmp/exec_{run_id}.sh"
+            return command, _tar_archive({f"exec_{run_id}.sh": code})
 
         else:
-            raise ValueError(f"Unsupported language: {request.language}")
+            raise ValueError(f"Unsupported language: {language}")
 
     # File management methods
     async def upload_file(self, request: FileUploadRequest) -> FileUploadResponse:
@@ -311,32 +596,30 @@ rm -rf /tmp/csharp_exec_{int(time.time())}"""
         """Get details of an uploaded file."""
         return await self.file_manager.get_file(file_id)
 
+    async def get_uploaded_file_metadata(self, file_id: str) -> dict[str, Any] | None:
+        """Get details of an uploaded file without its content."""
+        return await self.file_manager.get_file_metadata(file_id)
+
     async def delete_uploaded_file(self, file_id: str) -> bool:
         """Delete an uploaded file."""
         return await self.file_manager.delete_file(file_id)
 
     async def execute_uploaded_file(self, request: FileExecutionRequest) -> ExecuteCodeResponse:
         """Execute an uploaded file."""
-        file_info = await self.file_manager.get_file(request.file_id)
-        if not file_info:
+        file_info = await self.file_manager.get_file_metadata(request.file_id)
+        if file_info is None or not (file_path := Path(file_info["file_path"])).exists():
             return ExecuteCodeResponse(
-                execution_id=f"exec_{int(time.time())}_error",
+                execution_id=f"exec_{_run_id()}_error",
                 status=ExecutionStatus.FAILED,
                 error_message="File not found",
             )
 
-        # Create execute request from file content
-        execute_request = ExecuteCodeRequest(
-            language=file_info["language"],
-            code=file_info["content"],
-            image_id=request.image_id,
-            working_directory=request.working_directory,
-            environment_variables=request.environment_variables,
-            resource_limits=request.resource_limits,
-            input_data=request.input_data,
-        )
-
-        return await self.execute_code(execute_request)
+        # Ship the stored bytes straight into the container
+        content = await asyncio.to_thread(file_path.read_bytes)
+        encoding = file_info.get("encoding", "utf-8")
+        if encoding.lower().replace("-", "") != "utf8":
+            content = content.decode(encoding).encode()
+        return await self._execute_file_bytes(request, Language(file_info["language"]), content)
 
     async def get_file_manager_stats(self) -> dict[str, Any]:
         """Get file manager statistics."""
@@ -359,7 +642,7 @@ rm -rf /tmp/csharp_exec_{int(time.time())}"""
         try:
             # Get the base image
             try:
-                base_image = self.client.images.get(request.image_id)
+                await asyncio.to_thread(self.client.images.get, request.image_id)
             except docker.errors.ImageNotFound:  # type: ignore[import-untyped]
                 return InstallPackageResponse(
                     success=False,
@@ -380,30 +663,23 @@ USER sandboxuser
 """
 
             # Sanitize package name for Docker tag
-            safe_package_name = re.sub(r"[^a-zA-Z0-9-]", "-", request.package_name).lower()
-            safe_package_name = re.sub(r"-+", "-", safe_package_name).strip("-")
+            safe_package_name = _PKG_SANITIZE.sub("-", request.package_name.lower()).strip("-")
 
             # Generate new image name
             new_image_name = f"mcp-executor-with-{safe_package_name}-{int(time.time())}"
 
-            # Build new image
-            with tempfile.TemporaryDirectory() as temp_dir:
-                dockerfile_path = os.path.join(temp_dir, "Dockerfile")
-                with open(dockerfile_path, "w") as f:
-                    f.write(dockerfile_content)
-
-                image, build_logs = self.client.images.build(
-                    path=temp_dir, tag=f"{new_image_name}:latest", rm=True, forcerm=True
-                )
+            # Build new image; only the package layer is new, everything else comes from the base image
+            build_logs: list[str] = []
+            image = await asyncio.to_thread(
+                self._stream_build,
+                dockerfile_content,
+                f"{new_image_name}:latest",
+                build_logs,
+                cache_from=[request.image_id],
+            )
 
-                return InstallPackageResponse(
-                    success=True,
-                    new_image_id=image.id,
-                    build_logs=[
-                        str(log.get("stream", "")) if isinstance(log, dict) and "stream" in log else str(log)
-                        for log in build_logs
-                    ],
-                )
+            self._image_count_cache = None
+            return InstallPackageResponse(success=True, new_image_id=image.id, build_logs=build_logs)
 
         except Exception as e:
             logger.exception("Failed to build image with package")
@@ -412,8 +688,11 @@ USER sandboxuser
     async def _install_package_in_container(self, request: InstallPackageRequest) -> InstallPackageResponse:
         """Install package in a running container."""
         try:
-            # Find running containers for the image
-            containers = self.client.containers.list(filters={"ancestor": request.image_id})
+            # Warm containers are handed to unrelated executions, so never install into them
+            running = await asyncio.to_thread(
+                self.client.containers.list, filters={"ancestor": request.image_id, "status": "running"}
+            )
+            containers = [container for container in running if WARM_CONTAINER_LABEL not in container.labels]
             if not containers:
                 return InstallPackageResponse(
                     success=False,
@@ -451,9 +730,9 @@ USER sandboxuser
 
             # Execute the installation command as root for npm and C#
             if request.language in [Language.NODE, Language.CSHARP]:
-                result = container.exec_run(cmd, user="root")
+                result = await asyncio.to_thread(container.exec_run, cmd, user="root")
             else:
-                result = container.exec_run(cmd)
+                result = await asyncio.to_thread(container.exec_run, cmd)
 
             if result.exit_code == 0:
                 return InstallPackageResponse(
@@ -499,7 +778,7 @@ dotnet add package {package_spec}"""
     ) -> bool:
         """Install a package in a specific running container."""
         try:
-            container = self.client.containers.get(container_id)
+            container = await asyncio.to_thread(self.client.containers.get, container_id)
 
             package_spec = f"{package_name}=={package_version}" if package_version else package_name
 
@@ -525,9 +804,9 @@ dotnet add package {package_spec}"""
 
             # Execute the command as root for npm and C#
             if language in [Language.NODE, Language.CSHARP]:
-                result = container.exec_run(cmd, user="root")
+                result = await asyncio.to_thread(container.exec_run, cmd, user="root")
             else:
-                result = container.exec_run(cmd)
+                result = await asyncio.to_thread(container.exec_run, cmd)
 
             if result.exit_code == 0:
                 logger.info(f"Successfully installed {package_spec} in container {container_id}")
@@ -551,9 +830,16 @@ dotnet add package {package_spec}"""
                 "request": request,
                 "status": "running",
                 "start_time": time.time(),
-                "logs": [],
+                "logs": deque(maxlen=STREAM_LOG_SIZE),
+                "log_seq": 0,
+                "last_sent_seq": 0,
+                "done": asyncio.Event(),
+                "subscribers": [],
             }
 
+            if self._streaming_sweeper is None or self._streaming_sweeper.done():
+                self._streaming_sweeper = asyncio.create_task(self._sweep_streaming())
+
             # Start the execution in the background
             task = asyncio.create_task(self._monitor_streaming_execution(execution_id))
             # Store task reference to prevent garbage collection
@@ -579,12 +865,43 @@ dotnet add package {package_spec}"""
             execution_data["status"] = "completed" if response.status == ExecutionStatus.COMPLETED else "failed"
             execution_data["response"] = response
             execution_data["end_time"] = time.time()
+            for output in (response.stdout, response.stderr):
+                if output:
+                    self._append_logs(execution_data, output.splitlines())
 
         except Exception as e:
             logger.exception(f"Error monitoring streaming execution {execution_id}")
             if execution_id in self.streaming_executions:
                 self.streaming_executions[execution_id]["status"] = "failed"
                 self.streaming_executions[execution_id]["error"] = str(e)
+        finally:
+            if execution_id in self.streaming_executions:
+                self.streaming_executions[execution_id].setdefault("end_time", time.time())
+                self.streaming_executions[execution_id]["done"].set()
+                self._publish(execution_id)
+
+    async def _sweep_streaming(self) -> None:
+        """Periodically forget streaming executions that finished more than STREAM_RESULT_TTL ago."""
+        while True:
+            await asyncio.sleep(STREAM_RESULT_TTL / 2)
+            self._expire_streaming()
+
+    def _expire_streaming(self) -> None:
+        """Forget streaming executions that finished more than STREAM_RESULT_TTL ago."""
+        cutoff = time.time() - STREAM_RESULT_TTL
+        expired = [
+            execution_id
+            for execution_id, execution_data in self.streaming_executions.items()
+            if execution_data["done"].is_set() and execution_data["end_time"] < cutoff
+        ]
+        for execution_id in expired:
+            del self.streaming_executions[execution_id]
+
+    @staticmethod
+    def _append_logs(execution_data: dict, lines: list[str]) -> None:
+        """Append log lines to a streaming execution, advancing its sequence number."""
+        execution_data["logs"].extend(lines)
+        execution_data["log_seq"] += len(lines)
 
     async def get_execution_progress(self, execution_id: str) -> dict:
         """Get the progress of a streaming execution."""
@@ -592,21 +909,67 @@ dotnet add package {package_spec}"""
         if not execution_data:
             return {"error": "Execution not found"}
 
+        return self._progress(execution_id, execution_data)
+
+    def subscribe(self, execution_id: str) -> asyncio.Queue[dict] | None:
+        """Return a queue that receives the execution's progress now and again whenever it changes."""
+        execution_data = self.streaming_executions.get(execution_id)
+        if not execution_data:
+            return None
+
+        queue: asyncio.Queue[dict] = asyncio.Queue()
+        queue.put_nowait(self._progress(execution_id, execution_data))
+        if not execution_data["done"].is_set():
+            execution_data["subscribers"].append(queue)
+        return queue
+
+    def unsubscribe(self, execution_id: str, queue: asyncio.Queue[dict]) -> None:
+        """Stop sending progress updates to a queue returned by subscribe."""
+        execution_data = self.streaming_executions.get(execution_id)
+        if execution_data and queue in execution_data["subscribers"]:
+            execution_data["subscribers"].remove(queue)
+
+    def _publish(self, execution_id: str) -> None:
+        """Push the current progress of an execution to its subscribers."""
+        execution_data = self.streaming_executions[execution_id]
+        progress = self._progress(execution_id, execution_data)
+        for queue in execution_data["subscribers"]:
+            queue.put_nowait(progress)
+
+    @staticmethod
+    def _progress(execution_id: str, execution_data: dict) -> dict:
+        """Build the progress report of a streaming execution."""
         return {
             "execution_id": execution_id,
             "status": execution_data["status"],
             "start_time": execution_data["start_time"],
             "end_time": execution_data.get("end_time"),
-            "logs": execution_data.get("logs", []),
+            "logs": list(execution_data["logs"]),
             "response": execution_data.get("response"),
             "error": execution_data.get("error"),
         }
 
+    async def wait_for_execution(self, execution_id: str, timeout: float) -> dict:
+        """Wait up to timeout seconds for a streaming execution to finish, then return its progress."""
+        execution_data = self.streaming_executions.get(execution_id)
+        if execution_data:
+            try:
+                await asyncio.wait_for(execution_data["done"].wait(), timeout)
+            except TimeoutError:
+                pass
+
+        return await self.get_execution_progress(execution_id)
+
     async def stream_execution_logs(self, execution_id: str) -> str:
         """Stream logs for a specific execution."""
         execution_data = self.streaming_executions.get(execution_id)
         if not execution_data:
-            return f"data: {json.dumps({'error': 'Execution not found'})}\n\n"
-
-        logs = execution_data.get("logs", [])
-        return f"data: {json.dumps({'logs': logs})}\n\n"
+            return f"data: {_encode_json({'error': 'Execution not found'})}\n\n"
+
+        # Only send lines added since the previous call that are still buffered
+        logs = execution_data["logs"]
+        log_seq = execution_data["log_seq"]
+        new_count = min(log_seq - execution_data["last_sent_seq"], len(logs))
+        execution_data["last_sent_seq"] = log_seq
+        new_logs = list(islice(logs, len(logs) - new_count, None))
+        return f"data: {_encode_json({'logs': new_logs})}\n\n"
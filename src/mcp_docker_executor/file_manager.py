@@ -2,13 +2,72 @@
 File manager for handling uploaded files.
 """
 
-import uuid
+import asyncio
+import mmap
+import os
+import secrets
+import sqlite3
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+import orjson
+
 from .models import FileListResponse, FileUploadRequest, FileUploadResponse, Language
 
+# Metadata columns, in the order they are stored
+_COLUMNS = ("file_id", "filename", "language", "file_path", "size", "uploaded_at", "encoding", "binary")
+_CREATE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS files (file_id TEXT PRIMARY KEY, filename TEXT, language TEXT, "
+    "file_path TEXT, size INTEGER, uploaded_at TEXT, encoding TEXT, binary INTEGER)"
+)
+_SELECT_ALL = f"SELECT {', '.join(_COLUMNS)} FROM files"
+_INSERT = f"INSERT OR IGNORE INTO files ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+_DELETE = "DELETE FROM files WHERE file_id = ?"
+# Suffix of the per-file JSON metadata used before SQLite, and the one it is renamed to once imported
+_LEGACY_SUFFIX = "_metadata.json"
+_IMPORTED_SUFFIX = "_metadata.json.imported"
+
+
+def _metadata_row(metadata: dict[str, Any]) -> tuple:
+    """Turn a metadata dict into a files table row."""
+    return (
+        metadata["file_id"],
+        metadata["filename"],
+        metadata["language"],
+        metadata["file_path"],
+        metadata.get("size", 0),
+        metadata.get("uploaded_at"),
+        metadata.get("encoding", "utf-8"),
+        int(metadata.get("binary", False)),
+    )
+
+
+def _row_metadata(row: tuple[Any, ...]) -> dict[str, Any]:
+    """Turn a files table row into a metadata dict."""
+    metadata: dict[str, Any] = dict(zip(_COLUMNS, row, strict=True))
+    metadata["binary"] = bool(metadata["binary"])
+    return metadata
+
+
+def _read_content(file_path: Path, encoding: str) -> str | None:
+    """Read an uploaded file's content, or None if it is gone; run in a worker thread."""
+    try:
+        with open(file_path, "rb") as f:
+            # Decode straight from the page cache; mmap can't map empty files
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return str(mapped, encoding)
+    except FileNotFoundError:
+        return None
+
+
+def _remove_upload(file_path: Path, legacy_metadata_path: Path) -> None:
+    """Delete an uploaded file and its imported pre-SQLite metadata file, if any; run in a worker thread."""
+    file_path.unlink(missing_ok=True)
+    legacy_metadata_path.unlink(missing_ok=True)
+
 
 class FileManager:
     """Manages uploaded files for execution."""
@@ -19,22 +78,82 @@ class FileManager:
         self.upload_dir.mkdir(exist_ok=True)
 
         # Create language-specific subdirectories
-        for language in Language:
-            (self.upload_dir / language.value).mkdir(exist_ok=True)
+        self._lang_dirs: dict[Language, Path] = {language: self.upload_dir / language.value for language in Language}
+        for language_dir in self._lang_dirs.values():
+            language_dir.mkdir(exist_ok=True)
+
+        # Metadata lives in SQLite; all access after startup happens under self._lock
+        self._db = sqlite3.connect(self.upload_dir / "metadata.db", isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_CREATE_TABLE)
+        self._import_legacy_metadata()
+
+        # Metadata of every uploaded file by file ID; the database is only read in full once, here
+        self._index: dict[str, dict[str, Any]] = {row[0]: _row_metadata(row) for row in self._db.execute(_SELECT_ALL)}
+        self._lock = asyncio.Lock()
+
+        # Bumped on every upload and delete; the random prefix keeps ETags from repeating across restarts
+        self._etag_prefix = secrets.token_hex(4)
+        self._version = 0
+
+        # Running totals for get_stats, kept in step with the index
+        self._files_by_language = dict.fromkeys((language.value for language in self._lang_dirs), 0)
+        self._total_size = 0
+        for metadata in self._index.values():
+            self._count(metadata, 1)
+
+    @property
+    def etag(self) -> str:
+        """Weak ETag that changes whenever the set of uploaded files does."""
+        return f'W/"{self._etag_prefix}-{self._version}"'
+
+    def _count(self, metadata: dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a file's contribution to the running totals."""
+        self._files_by_language[metadata["language"]] += sign
+        self._total_size += sign * metadata.get("size", 0)
+        self._version += 1
+
+    def _import_legacy_metadata(self) -> None:
+        """Copy metadata from the per-file JSON files used before SQLite into the database."""
+        rows = []
+        imported = []
+        for language_dir in self._lang_dirs.values():
+            with os.scandir(language_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(_LEGACY_SUFFIX):
+                        continue
+                    try:
+                        with open(entry.path, "rb") as f:
+                            rows.append(_metadata_row(orjson.loads(f.read())))
+                        imported.append(entry.path)
+                    except Exception as e:
+                        print(f"Error reading metadata file {entry.path}: {e}")
+
+        if rows:
+            self._db.execute("BEGIN")
+            self._db.executemany(_INSERT, rows)
+            self._db.execute("COMMIT")
+
+        # Rename only once the rows are committed, so a failed import is retried on the next start
+        for path in imported:
+            os.replace(path, path.removesuffix(_LEGACY_SUFFIX) + _IMPORTED_SUFFIX)
+
+    def close(self) -> None:
+        """Close the metadata database."""
+        self._db.close()
 
     async def upload_file(self, request: FileUploadRequest) -> FileUploadResponse:
         """Upload a file for execution."""
         try:
             # Generate unique file ID
-            file_id = str(uuid.uuid4())
+            file_id = secrets.token_hex(16)
 
-            # Create language-specific directory
-            language_dir = self.upload_dir / request.language.value
+            # Language-specific directory
+            language_dir = self._lang_dirs[request.language]
             file_path = language_dir / f"{file_id}_{request.filename}"
 
-            # Write file content
-            with open(file_path, "w", encoding=request.encoding) as f:
-                f.write(request.content)
+            # Encode once; size is the byte length of what lands on disk
+            data = request.content.encode(request.encoding)
 
             # Store metadata
             metadata: dict[str, Any] = {
@@ -42,18 +161,19 @@ class FileManager:
                 "filename": request.filename,
                 "language": request.language.value,
                 "file_path": str(file_path),
-                "size": len(request.content),
+                "size": len(data),
                 "uploaded_at": datetime.now().isoformat(),
                 "encoding": request.encoding,
                 "binary": request.binary,
             }
 
-            # Save metadata
-            metadata_path = language_dir / f"{file_id}_metadata.json"
-            import json
+            # Write file content off the event loop
+            await asyncio.to_thread(file_path.write_bytes, data)
 
-            with open(metadata_path, "w") as f:
-                json.dump(metadata, f, indent=2)
+            async with self._lock:
+                await asyncio.to_thread(self._db.execute, _INSERT, _metadata_row(metadata))
+                self._index[file_id] = metadata
+                self._count(metadata, 1)
 
             return FileUploadResponse(success=True, file_id=file_id, file_path=str(file_path))
 
@@ -63,31 +183,10 @@ class FileManager:
     async def list_files(self) -> FileListResponse:
         """List all uploaded files."""
         try:
-            files = []
-            total_count = 0
+            # Remove file_path for security
+            files = [{k: v for k, v in metadata.items() if k != "file_path"} for metadata in self._index.values()]
 
-            for language in Language:
-                language_dir = self.upload_dir / language.value
-                if not language_dir.exists():
-                    continue
-
-                for metadata_file in language_dir.glob("*_metadata.json"):
-                    try:
-                        import json
-
-                        with open(metadata_file) as f:
-                            metadata = json.load(f)
-
-                        # Remove file_path for security
-                        safe_metadata = {k: v for k, v in metadata.items() if k != "file_path"}
-                        files.append(safe_metadata)
-                        total_count += 1
-
-                    except Exception as e:
-                        print(f"Error reading metadata file {metadata_file}: {e}")
-                        continue
-
-            return FileListResponse(files=files, total_count=total_count)  # type: ignore[call-arg]
+            return FileListResponse(files=files, total_count=len(files))  # type: ignore[call-arg]
 
         except Exception:
             return FileListResponse(files=[], total_count=0)
@@ -95,55 +194,44 @@ class FileManager:
     async def get_file(self, file_id: str) -> dict[str, Any] | None:
         """Get file information and content."""
         try:
-            for language in Language:
-                language_dir = self.upload_dir / language.value
-                metadata_path = language_dir / f"{file_id}_metadata.json"
-
-                if metadata_path.exists():
-                    import json
-
-                    with open(metadata_path) as f:
-                        metadata = json.load(f)
-
-                    # Read file content
-                    file_path = Path(metadata["file_path"])
-                    if file_path.exists():
-                        with open(file_path, encoding=metadata.get("encoding", "utf-8")) as f:
-                            content = f.read()
+            metadata = await self.get_file_metadata(file_id)
+            if metadata is None:
+                return None
 
-                        metadata["content"] = content
-                        return metadata
+            # Read file content
+            content = await asyncio.to_thread(
+                _read_content, Path(metadata["file_path"]), metadata.get("encoding", "utf-8")
+            )
+            if content is None:
+                return None
 
-            return None
+            metadata["content"] = content
+            return metadata
 
         except Exception as e:
             print(f"Error getting file {file_id}: {e}")
             return None
 
+    async def get_file_metadata(self, file_id: str) -> dict[str, Any] | None:
+        """Get file information without reading its content."""
+        metadata = self._index.get(file_id)
+        return dict(metadata) if metadata is not None else None
+
     async def delete_file(self, file_id: str) -> bool:
         """Delete an uploaded file."""
         try:
-            for language in Language:
-                language_dir = self.upload_dir / language.value
-                metadata_path = language_dir / f"{file_id}_metadata.json"
-
-                if metadata_path.exists():
-                    import json
-
-                    with open(metadata_path) as f:
-                        metadata = json.load(f)
-
-                    # Delete the actual file
-                    file_path = Path(metadata["file_path"])
-                    if file_path.exists():
-                        file_path.unlink()
+            async with self._lock:
+                if file_id not in self._index:
+                    return False
+                await asyncio.to_thread(self._db.execute, _DELETE, (file_id,))
+                metadata = self._index.pop(file_id)
+                self._count(metadata, -1)
 
-                    # Delete metadata
-                    metadata_path.unlink()
+            # Delete the file off the event loop
+            legacy_metadata_path = self._lang_dirs[Language(metadata["language"])] / f"{file_id}{_IMPORTED_SUFFIX}"
+            await asyncio.to_thread(_remove_upload, Path(metadata["file_path"]), legacy_metadata_path)
 
-                    return True
-
-            return False
+            return True
 
         except Exception as e:
             print(f"Error deleting file {file_id}: {e}")
@@ -151,41 +239,9 @@ class FileManager:
 
     async def get_stats(self) -> dict[str, Any]:
         """Get file manager statistics."""
-        try:
-            stats: dict[str, Any] = {
-                "total_files": 0,
-                "files_by_language": {},
-                "total_size": 0,
-                "upload_dir": str(self.upload_dir),
-            }
-
-            for language in Language:
-                language_dir = self.upload_dir / language.value
-                if not language_dir.exists():
-                    stats["files_by_language"][language.value] = 0
-                    continue
-
-                language_files = list(language_dir.glob("*_metadata.json"))
-                stats["files_by_language"][language.value] = len(language_files)
-                stats["total_files"] += len(language_files)
-
-                # Calculate total size
-                for metadata_file in language_files:
-                    try:
-                        import json
-
-                        with open(metadata_file) as f:
-                            metadata = json.load(f)
-                        stats["total_size"] += metadata.get("size", 0)
-                    except Exception:
-                        continue
-
-            return stats
-
-        except Exception as e:
-            return {
-                "error": str(e),
-                "total_files": 0,
-                "files_by_language": {},
-                "total_size": 0,
-            }
+        return {
+            "total_files": len(self._index),
+            "files_by_language": dict(self._files_by_language),
+            "total_size": self._total_size,
+            "upload_dir": str(self.upload_dir),
+        }
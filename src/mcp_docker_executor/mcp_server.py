@@ -7,11 +7,12 @@ LLMs to execute code in Docker containers with support for multiple languages.
 """
 
 import logging
+import time
 
 from mcp.server.fastmcp import FastMCP
 
-from mcp_docker_executor.docker_manager import DockerManager
-from mcp_docker_executor.models import ExecuteCodeRequest, Language
+from mcp_docker_executor.models import ExecuteCodeRequest, ExecuteCodeResponse, Language, ResourceLimits
+from mcp_docker_executor.runtime import get_docker_manager
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -20,8 +21,37 @@ logger = logging.getLogger(__name__)
 # Create FastMCP server instance
 mcp = FastMCP("mcp-docker-executor")
 
-# Initialize Docker manager
-docker_manager = DockerManager()
+# Docker manager shared with the HTTP server when both run in one process
+docker_manager = get_docker_manager()
+
+# Report layout shared by the execution tools
+_EXECUTION_TEMPLATE = """{title}:
+- Execution ID: {id}
+- Status: {status}
+- Exit Code: {code}
+- Execution Time: {time:.2f}s
+
+STDOUT:
+{stdout}
+
+STDERR:
+{stderr}"""
+
+
+def _format_execution(title: str, result: ExecuteCodeResponse) -> str:
+    """Render an execution result as tool output."""
+    text = _EXECUTION_TEMPLATE.format(
+        title=title,
+        id=result.execution_id,
+        status=result.status.value,
+        code=result.exit_code,
+        time=result.execution_time_seconds,
+        stdout=result.stdout,
+        stderr=result.stderr,
+    )
+    if result.error_message:
+        text += f"\nError: {result.error_message}"
+    return text
 
 
 @mcp.tool()
@@ -47,32 +77,18 @@ async def execute_code(
     try:
         lang_enum = Language(language)
 
-        request = ExecuteCodeRequest(
+        # Arguments were already checked against the tool schema; only the limits need validating
+        request = ExecuteCodeRequest.model_construct(
             language=lang_enum,
             code=code,
             image_id=image_id,
             working_directory=working_directory,
-            timeout_seconds=timeout_seconds,
+            resource_limits=ResourceLimits(timeout_seconds=timeout_seconds),
         )
 
         result = await docker_manager.execute_code(request)
 
-        response_text = f"""Execution Result:
-- Execution ID: {result.execution_id}
-- Status: {result.status.value}
-- Exit Code: {result.exit_code}
-- Execution Time: {result.execution_time_seconds:.2f}s
-
-STDOUT:
-{result.stdout}
-
-STDERR:
-{result.stderr}"""
-
-        if result.error_message:
-            response_text += f"\nError: {result.error_message}"
-
-        return response_text
+        return _format_execution("Execution Result", result)
 
     except Exception as e:
         logger.exception("Error executing code")
@@ -96,19 +112,21 @@ async def create_image(languages: list[str], image_name: str) -> str:
 
         lang_enums = [LangEnum(lang) for lang in languages]
 
-        request = CreateImageRequest(languages=lang_enums, image_name=image_name)
+        request = CreateImageRequest.model_construct(languages=lang_enums, image_name=image_name)
 
+        started = time.perf_counter()
         result = await docker_manager.create_image(request)
+        build_time = time.perf_counter() - started
 
         if result.success:
             response_text = f"""Image Created Successfully:
 - Image ID: {result.image_id}
 - Image Name: {image_name}
 - Languages: {", ".join(languages)}
-- Build Time: {result.build_time_seconds:.2f}s
+- Build Time: {build_time:.2f}s
 
 Build Logs:
-{result.build_logs}"""
+{"".join(result.build_logs)}"""
         else:
             response_text = f"Failed to create image: {result.error_message}"
 
@@ -128,7 +146,7 @@ async def install_package(
     Args:
         package_name: Name of the package to install
         language: Language for package manager (python, node, csharp)
-        image_id: Docker image ID (optional, will create new image if not provided)
+        image_id: Docker image ID to install the package into (required)
         build_new_image: Whether to build a new image with the package (default: True)
 
     Returns:
@@ -140,21 +158,29 @@ async def install_package(
 
         lang_enum = LangEnum(language)
 
-        request = InstallPackageRequest(
-            package_name=package_name, language=lang_enum, image_id=image_id, build_new_image=build_new_image
+        # Validated, unlike the other tools: image_id is optional in the tool schema but required here
+        request = InstallPackageRequest.model_validate(
+            {
+                "package_name": package_name,
+                "language": lang_enum,
+                "image_id": image_id,
+                "build_new_image": build_new_image,
+            }
         )
 
+        started = time.perf_counter()
         result = await docker_manager.install_package(request)
+        installation_time = time.perf_counter() - started
 
         if result.success:
             response_text = f"""Package Installed Successfully:
 - Package: {package_name}
 - Language: {language}
 - New Image ID: {result.new_image_id}
-- Installation Time: {result.installation_time_seconds:.2f}s
+- Installation Time: {installation_time:.2f}s
 
 Installation Logs:
-{result.installation_logs}"""
+{"".join(result.build_logs)}"""
         else:
             response_text = f"Failed to install package: {result.error_message}"
 
@@ -183,15 +209,17 @@ async def upload_file(filename: str, content: str, language: str) -> str:
 
         lang_enum = LangEnum(language)
 
-        request = FileUploadRequest(filename=filename, content=content, language=lang_enum)
+        request = FileUploadRequest.model_construct(filename=filename, content=content, language=lang_enum)
 
         result = await docker_manager.upload_file(request)
+        if not result.success:
+            return f"Failed to upload file: {result.error_message}"
 
         response_text = f"""File Uploaded Successfully:
 - File ID: {result.file_id}
 - Filename: {filename}
 - Language: {language}
-- Size: {result.size} bytes"""
+- Size: {len(content.encode(request.encoding))} bytes"""
 
         return response_text
 
@@ -214,26 +242,11 @@ async def execute_uploaded_file(file_id: str, image_id: str = "debug-test:latest
     try:
         from mcp_docker_executor.models import FileExecutionRequest
 
-        request = FileExecutionRequest(file_id=file_id, image_id=image_id)
+        request = FileExecutionRequest.model_construct(file_id=file_id, image_id=image_id)
 
         result = await docker_manager.execute_uploaded_file(request)
 
-        response_text = f"""File Execution Result:
-- Execution ID: {result.execution_id}
-- Status: {result.status.value}
-- Exit Code: {result.exit_code}
-- Execution Time: {result.execution_time_seconds:.2f}s
-
-STDOUT:
-{result.stdout}
-
-STDERR:
-{result.stderr}"""
-
-        if result.error_message:
-            response_text += f"\nError: {result.error_message}"
-
-        return response_text
+        return _format_execution("File Execution Result", result)
 
     except Exception as e:
         logger.exception("Error executing uploaded file")
@@ -253,15 +266,15 @@ async def list_files() -> str:
         if not result.files:
             return "No files uploaded."
 
-        response_text = f"Uploaded Files ({result.total_count}):\n\n"
-        for file_info in result.files:
-            response_text += f"- ID: {file_info['file_id']}\n"
-            response_text += f"  Filename: {file_info['filename']}\n"
-            response_text += f"  Language: {file_info['language']}\n"
-            response_text += f"  Size: {file_info['size']} bytes\n"
-            response_text += f"  Uploaded: {file_info['upload_time']}\n\n"
-
-        return response_text
+        entries = (
+            f"- ID: {file_info['file_id']}\n"
+            f"  Filename: {file_info['filename']}\n"
+            f"  Language: {file_info['language']}\n"
+            f"  Size: {file_info['size']} bytes\n"
+            f"  Uploaded: {file_info['uploaded_at']}\n\n"
+            for file_info in result.files
+        )
+        return f"Uploaded Files ({result.total_count}):\n\n" + "".join(entries)
 
     except Exception as e:
         logger.exception("Error listing files")
@@ -304,7 +317,7 @@ async def docker_health() -> str:
         if health_status:
             # Get additional info
             active_containers = len(docker_manager.active_containers)
-            available_images = len(docker_manager.client.images.list())
+            available_images = await docker_manager.cached_image_count()
 
             response_text = f"""Docker Status: ✅ Healthy
 
@@ -5,7 +5,7 @@ Pydantic models for the MCP Docker Executor.
 from enum import Enum
 from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Language(str, Enum):
@@ -38,6 +38,8 @@ class SecurityLevel(str, Enum):
 class ResourceLimits(BaseModel):
     """Resource limits for container execution."""
 
+    model_config = ConfigDict(frozen=True)
+
     memory_mb: int = Field(default=512, ge=64, le=8192)
     cpu_cores: float = Field(default=1.0, ge=0.1, le=8.0)
     timeout_seconds: int = Field(default=300, ge=10, le=3600)
@@ -52,6 +54,9 @@ class CreateImageRequest(BaseModel):
     image_name: str | None = None
     custom_dockerfile: str | None = None
     base_os: str = Field(default="ubuntu:22.04")
+    force_rebuild: bool = Field(default=False, description="Build without Docker's layer cache")
+    cache_from: list[str] = Field(default_factory=list, description="Extra images to use as layer cache sources")
+    labels: dict[str, str] = Field(default_factory=dict, description="Labels to set on the built image")
 
 
 class CreateImageResponse(BaseModel):
@@ -62,11 +67,14 @@ class CreateImageResponse(BaseModel):
     image_name: str | None = None
     build_logs: list[str] = Field(default_factory=list)
     error_message: str | None = None
+    cached: bool = Field(default=False, description="True when an earlier build was reused")
 
 
 class ExecuteCodeRequest(BaseModel):
     """Request to execute code in a container."""
 
+    model_config = ConfigDict(frozen=True)
+
     language: Language
     code: str
     image_id: str | None = None
@@ -121,6 +129,8 @@ class ExecutionProgress(BaseModel):
 class StreamExecutionRequest(BaseModel):
     """Request for streaming execution."""
 
+    model_config = ConfigDict(frozen=True)
+
     language: Language
     code: str
     image_id: str | None = None
@@ -167,6 +177,25 @@ class FileUploadResponse(BaseModel):
     error_message: str | None = None
 
 
+class FileUploadBatchRequest(BaseModel):
+    """Request to upload several files in one call."""
+
+    files: list[FileUploadRequest] = Field(min_length=1)
+
+
+class FileDeleteBatchRequest(BaseModel):
+    """Request to delete several uploaded files in one call."""
+
+    file_ids: list[str] = Field(min_length=1)
+
+
+class FileDeleteBatchResponse(BaseModel):
+    """Response from a batch file deletion."""
+
+    deleted: list[str] = Field(default_factory=list)
+    not_found: list[str] = Field(default_factory=list)
+
+
 class FileListResponse(BaseModel):
     """Response containing list of uploaded files."""
 
@@ -177,6 +206,8 @@ class FileListResponse(BaseModel):
 class FileExecutionRequest(BaseModel):
     """Request to execute an uploaded file."""
 
+    model_config = ConfigDict(frozen=True)
+
     file_id: str
     container_id: str | None = None
     image_id: str | None = None
@@ -184,3 +215,9 @@ class FileExecutionRequest(BaseModel):
     environment_variables: dict[str, str] = Field(default_factory=dict)
     resource_limits: ResourceLimits = Field(default_factory=ResourceLimits)
     input_data: str | None = None
+
+
+class FileExecutionBatchRequest(BaseModel):
+    """Request to execute several uploaded files in one call."""
+
+    executions: list[FileExecutionRequest] = Field(min_length=1)
@@ -0,0 +1,23 @@
+"""
+Process-wide Docker manager shared by the HTTP and MCP servers.
+"""
+
+from .docker_manager import DockerManager
+
+_manager: DockerManager | None = None
+
+
+def get_docker_manager() -> DockerManager:
+    """Return the shared Docker manager, creating it on first use."""
+    global _manager
+    if _manager is None:
+        _manager = DockerManager()
+    return _manager
+
+
+def close_docker_manager() -> None:
+    """Close the shared Docker manager; the next get_docker_manager() call creates a new one."""
+    global _manager
+    if _manager is not None:
+        _manager.close()
+        _manager = None
@@ -3,30 +3,39 @@ FastAPI server for MCP Docker Executor.
 """
 
 import asyncio
-import json
 import logging
 import time
 import uuid
+import zlib
 from contextlib import asynccontextmanager
+from pathlib import Path
 from typing import Any
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+import orjson
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from .docker_manager import DockerManager
 from .models import (
     CreateImageRequest,
     CreateImageResponse,
     ExecuteCodeRequest,
     ExecuteCodeResponse,
+    FileDeleteBatchRequest,
+    FileDeleteBatchResponse,
+    FileExecutionBatchRequest,
     FileExecutionRequest,
     FileListResponse,
+    FileUploadBatchRequest,
     FileUploadRequest,
     FileUploadResponse,
     InstallPackageRequest,
     InstallPackageResponse,
+    Language,
     StreamExecutionRequest,
 )
+from .runtime import close_docker_manager, get_docker_manager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -35,6 +44,16 @@ logger = logging.getLogger(__name__)
 # Global MCP server instance
 mcp_server = None
 
+# Largest request body accepted after gzip decompression, in bytes
+MAX_REQUEST_BODY_SIZE = 64 * 1024 * 1024
+
+
+def _jsonable(obj: Any) -> Any:
+    """orjson fallback for the Pydantic models embedded in progress reports."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -55,12 +74,75 @@ async def lifespan(app: FastAPI):
         await mcp_server.shutdown()
 
 
+class GzipRequestMiddleware:
+    """Decompress request bodies sent with Content-Encoding: gzip."""
+
+    def __init__(self, app: ASGIApp, max_body_size: int = MAX_REQUEST_BODY_SIZE):
+        """Wrap the downstream ASGI app."""
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Inflate gzip request bodies before they reach the routes."""
+        if scope["type"] != "http" or not any(
+            key == b"content-encoding" and value.strip().lower() == b"gzip" for key, value in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # Inflate chunk by chunk, never producing more than one byte past the limit
+        decompressor = zlib.decompressobj(wbits=31)
+        chunks: list[bytes] = []
+        size = 0
+        more_body = True
+        try:
+            while more_body:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                more_body = message.get("more_body", False)
+                chunk = decompressor.decompress(message.get("body", b""), self.max_body_size - size + 1)
+                size += len(chunk)
+                if size > self.max_body_size:
+                    response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+                    await response(scope, receive, send)
+                    return
+                chunks.append(chunk)
+        except zlib.error:
+            valid = False
+        else:
+            # Reject truncated streams and anything after the gzip member
+            valid = decompressor.eof and not decompressor.unused_data
+
+        if not valid:
+            response = JSONResponse({"detail": "Invalid gzip request body"}, status_code=400)
+            await response(scope, receive, send)
+            return
+
+        body = b"".join(chunks)
+        headers = [
+            (key, value) for key, value in scope["headers"] if key not in (b"content-encoding", b"content-length")
+        ]
+        headers.append((b"content-length", str(len(body)).encode()))
+        body_sent = False
+
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app({**scope, "headers": headers}, receive_body, send)
+
+
 app = FastAPI(
     title="MCP Docker Executor",
     description="A Python-based Master Control Program server for Docker automation",
     version="0.1.0",
     lifespan=lifespan,
 )
+app.add_middleware(GzipRequestMiddleware)
 
 
 class MCPDockerExecutor:
@@ -68,7 +150,7 @@ class MCPDockerExecutor:
 
     def __init__(self):
         """Initialize the MCP server."""
-        self.docker_manager = DockerManager()
+        self.docker_manager = get_docker_manager()
         self.executions: dict[str, dict[str, Any]] = {}
 
     async def startup(self):
@@ -77,6 +159,19 @@ class MCPDockerExecutor:
         if not await self.docker_manager.health_check():
             raise RuntimeError("Docker is not available")
 
+    def record_execution(self, result: ExecuteCodeResponse) -> None:
+        """Store a finished execution so it can be fetched by ID."""
+        self.executions[result.execution_id] = {
+            "execution_id": result.execution_id,
+            "status": result.status,
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+            "exit_code": result.exit_code,
+            "error_message": result.error_message,
+            "execution_time_seconds": result.execution_time_seconds,
+            "timestamp": time.time(),
+        }
+
     async def shutdown(self):
         """Shutdown the MCP server."""
         # Clean up any running containers
@@ -87,6 +182,9 @@ class MCPDockerExecutor:
             except Exception as e:
                 logger.warning("Failed to clean up container %s", execution_id)
 
+        await self.docker_manager.wait_for_cleanup()
+        close_docker_manager()
+
 
 @app.get("/health")
 async def health_check():
@@ -98,7 +196,7 @@ async def health_check():
 
     # Get additional Docker info
     active_containers = len(mcp_server.docker_manager.active_containers)
-    available_images = len(mcp_server.docker_manager.client.images.list())
+    available_images = await mcp_server.docker_manager.cached_image_count()
 
     return {
         "status": "healthy" if docker_healthy else "unhealthy",
@@ -128,19 +226,32 @@ async def execute_code(request: ExecuteCodeRequest):
     result = await mcp_server.docker_manager.execute_code(request)
 
     # Store execution result
-    mcp_server.executions[result.execution_id] = {
-        "status": result.status,
-        "stdout": result.stdout,
-        "stderr": result.stderr,
-        "exit_code": result.exit_code,
-        "error_message": result.error_message,
-        "execution_time_seconds": result.execution_time_seconds,
-        "timestamp": time.time(),
-    }
+    mcp_server.record_execution(result)
 
     return result
 
 
+@app.get("/executions")
+async def get_execution_results(ids: str = Query(..., description="Comma-separated execution IDs")):
+    """Get the current status of several executions in one request."""
+    if not mcp_server:
+        raise HTTPException(status_code=503, detail="Server not ready")
+
+    results = []
+    for execution_id in filter(None, ids.split(",")):
+        if execution_id in mcp_server.executions:
+            results.append(mcp_server.executions[execution_id])
+            continue
+
+        progress = await mcp_server.docker_manager.get_execution_progress(execution_id)
+        if progress.get("error") == "Execution not found":
+            results.append({"execution_id": execution_id, "status": "not_found"})
+        else:
+            results.append(progress)
+
+    return results
+
+
 @app.get("/executions/{execution_id}")
 async def get_execution_result(execution_id: str):
     """Get execution result."""
@@ -153,6 +264,25 @@ async def get_execution_result(execution_id: str):
     return mcp_server.executions[execution_id]
 
 
+@app.get("/executions/{execution_id}/wait")
+async def wait_for_execution(
+    execution_id: str,
+    timeout: float = Query(default=30.0, ge=0.0, le=120.0, description="Seconds to wait for completion"),
+):
+    """Wait for an execution to finish (long-poll) and return its result."""
+    if not mcp_server:
+        raise HTTPException(status_code=503, detail="Server not ready")
+
+    if execution_id in mcp_server.executions:
+        return mcp_server.executions[execution_id]
+
+    progress = await mcp_server.docker_manager.wait_for_execution(execution_id, timeout)
+    if progress.get("error") == "Execution not found":
+        raise HTTPException(status_code=404, detail="Execution not found")
+
+    return progress
+
+
 @app.post("/packages/install", response_model=InstallPackageResponse)
 async def install_package(request: InstallPackageRequest):
     """Install a package in a Docker image or container."""
@@ -163,36 +293,124 @@ async def install_package(request: InstallPackageRequest):
 
 
 @app.post("/files/upload", response_model=FileUploadResponse)
-async def upload_file(request: FileUploadRequest):
-    """Upload a file for execution."""
+async def upload_file(
+    content: UploadFile = File(...),
+    language: Language = Form(...),
+    filename: str | None = Form(None),
+    encoding: str = Form("utf-8"),
+):
+    """Upload a file for execution as multipart form data."""
     if not mcp_server:
         raise HTTPException(status_code=503, detail="Server not ready")
 
+    filename = filename or content.filename
+    if not filename:
+        raise HTTPException(status_code=422, detail="filename is required")
+
+    try:
+        text = (await content.read()).decode(encoding)
+    except (LookupError, UnicodeDecodeError) as e:
+        return FileUploadResponse(success=False, error_message=f"Could not decode file: {e!s}")
+
+    request = FileUploadRequest(filename=filename, content=text, language=language, encoding=encoding)
     return await mcp_server.docker_manager.upload_file(request)
 
 
+@app.post("/files/upload:batch", response_model=list[FileUploadResponse])
+async def upload_files_batch(request: FileUploadBatchRequest):
+    """Upload several files in one request."""
+    if not mcp_server:
+        raise HTTPException(status_code=503, detail="Server not ready")
+
+    return await asyncio.gather(*(mcp_server.docker_manager.upload_file(item) for item in request.files))
+
+
+@app.post("/files:delete-batch", response_model=FileDeleteBatchResponse)
+async def delete_files_batch(request: FileDeleteBatchRequest):
+    """Delete several uploaded files in one request."""
+    if not mcp_server:
+        raise HTTPException(status_code=503, detail="Server not ready")
+
+    results = await asyncio.gather(
+        *(mcp_server.docker_manager.delete_uploaded_file(file_id) for file_id in request.file_ids)
+    )
+
+    response = FileDeleteBatchResponse()
+    for file_id, success in zip(request.file_ids, results, strict=True):
+        (response.deleted if success else response.not_found).append(file_id)
+
+    return response
+
+
+def _not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """Set the ETag header, returning a 304 response when the client's copy is current."""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
+
 @app.get("/files", response_model=FileListResponse)
-async def list_files():
+async def list_files(request: Request, response: Response):
     """List all uploaded files."""
     if not mcp_server:
         raise HTTPException(status_code=503, detail="Server not ready")
 
+    not_modified = _not_modified(request, response, mcp_server.docker_manager.file_manager.etag)
+    if not_modified:
+        return not_modified
+
     return await mcp_server.docker_manager.list_uploaded_files()
 
 
+@app.get("/files/stats")
+async def get_file_stats(request: Request, response: Response):
+    """Get file manager statistics."""
+    if not mcp_server:
+        raise HTTPException(status_code=503, detail="Server not ready")
+
+    not_modified = _not_modified(request, response, mcp_server.docker_manager.file_manager.etag)
+    if not_modified:
+        return not_modified
+
+    return await mcp_server.docker_manager.get_file_manager_stats()
+
+
 @app.get("/files/{file_id}")
 async def get_file_info(file_id: str):
     """Get file information."""
     if not mcp_server:
         raise HTTPException(status_code=503, detail="Server not ready")
 
-    file_info = await mcp_server.docker_manager.get_uploaded_file(file_id)
+    file_info = await mcp_server.docker_manager.get_uploaded_file_metadata(file_id)
     if not file_info:
         raise HTTPException(status_code=404, detail="File not found")
 
     return file_info
 
 
+@app.get("/files/{file_id}/content")
+async def get_file_content(file_id: str):
+    """Stream the content of an uploaded file."""
+    if not mcp_server:
+        raise HTTPException(status_code=503, detail="Server not ready")
+
+    file_info = await mcp_server.docker_manager.get_uploaded_file_metadata(file_id)
+    if file_info is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    file_path = Path(file_info["file_path"])
+    if not await asyncio.to_thread(file_path.is_file):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    # FileResponse sends straight from disk (sendfile where the server supports it)
+    if file_info.get("binary"):
+        media_type = "application/octet-stream"
+    else:
+        media_type = f"text/plain; charset={file_info.get('encoding', 'utf-8')}"
+    return FileResponse(file_path, media_type=media_type, filename=file_info["filename"])
+
+
 @app.delete("/files/{file_id}")
 async def delete_file(file_id: str):
     """Delete an uploaded file."""
@@ -212,17 +430,25 @@ async def execute_file(file_id: str, request: FileExecutionRequest):
     if not mcp_server:
         raise HTTPException(status_code=503, detail="Server not ready")
 
-    request.file_id = file_id
-    return await mcp_server.docker_manager.execute_uploaded_file(request)
+    result = await mcp_server.docker_manager.execute_uploaded_file(request.model_copy(update={"file_id": file_id}))
+    mcp_server.record_execution(result)
 
+    return result
 
-@app.get("/files/stats")
-async def get_file_stats():
-    """Get file manager statistics."""
+
+@app.post("/files/execute:batch", response_model=list[ExecuteCodeResponse])
+async def execute_files_batch(request: FileExecutionBatchRequest):
+    """Execute several uploaded files concurrently in one request."""
     if not mcp_server:
         raise HTTPException(status_code=503, detail="Server not ready")
 
-    return await mcp_server.docker_manager.get_file_manager_stats()
+    results = await asyncio.gather(
+        *(mcp_server.docker_manager.execute_uploaded_file(item) for item in request.executions)
+    )
+    for result in results:
+        mcp_server.record_execution(result)
+
+    return results
 
 
 @app.post("/execute/stream")
@@ -258,18 +484,20 @@ async def stream_execution_logs(execution_id: str):
     if not mcp_server:
         raise HTTPException(status_code=503, detail="Server not ready")
 
-    async def generate_logs():
-        while True:
-            progress = await mcp_server.docker_manager.get_execution_progress(execution_id)
-            if not progress:
-                break
-
-            if progress.get("status") in ["completed", "failed"]:
-                yield f"data: {json.dumps(progress)}\n\n"
-                break
+    queue = mcp_server.docker_manager.subscribe(execution_id)
+    if queue is None:
+        raise HTTPException(status_code=404, detail="Execution not found")
 
-            yield f"data: {json.dumps(progress)}\n\n"
-            await asyncio.sleep(1)
+    async def generate_logs():
+        # Progress is pushed on every change, so there is nothing to poll
+        try:
+            while True:
+                progress = await queue.get()
+                yield b"data: " + orjson.dumps(progress, default=_jsonable) + b"\n\n"
+                if progress["status"] in ("completed", "failed"):
+                    break
+        finally:
+            mcp_server.docker_manager.unsubscribe(execution_id, queue)
 
     return StreamingResponse(
         generate_logs(),
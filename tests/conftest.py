@@ -1,127 +1,183 @@
 """
 Pytest configuration and fixtures for MCP Docker Executor tests.
 
-IMPORTANT: This project uses INTEGRATION TESTS and E2E TESTS only.
-We do NOT write unit tests - all tests should use real Docker containers
-and test the actual functionality end-to-end.
+IMPORTANT: This project uses INTEGRATION TESTS and E2E TESTS for everything
+that touches Docker - those tests use real Docker containers and test the
+actual functionality end-to-end. Only HTTP client-side logic (polling, caching)
+gets unit tests, against an httpx.MockTransport, marked with "unit".
 """
 
 import asyncio
-from collections.abc import AsyncGenerator, Generator
+import os
+from collections.abc import AsyncGenerator, Awaitable, Callable, Generator
 from typing import Any
 
+import docker
 import pytest
+import pytest_asyncio
+from docker.errors import DockerException
+from pytest_asyncio import is_async_test
 
 from mcp_docker_executor.docker_manager import DockerManager
-from mcp_docker_executor.models import CreateImageRequest, Language
+from mcp_docker_executor.models import CreateImageRequest, CreateImageResponse, Language
 
-
-@pytest.fixture(scope="session")
-def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 
-@pytest.fixture
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def docker_manager() -> AsyncGenerator[DockerManager, None]:
     """Create a Docker manager instance for testing."""
-    manager = DockerManager()
+    # Verify Docker is available; as a session fixture this runs once, and a skip here skips every
+    # Docker-bound test while the Docker-free ones still run
+    try:
+        manager = DockerManager()
+    except DockerException as e:
+        pytest.skip(f"Docker is not available: {e}")
 
-    # Verify Docker is available
     if not await manager.health_check():
+        manager.close()
         pytest.skip("Docker is not available")
 
     yield manager
 
+    await manager.wait_for_cleanup()
+    manager.close()
 
-@pytest.fixture
-async def test_image_id(docker_manager: DockerManager) -> AsyncGenerator[str, None]:
-    """Create a test Docker image with all languages."""
-    request = CreateImageRequest(
-        languages=[Language.PYTHON, Language.NODE, Language.CSHARP],
-        image_name="test-multi-lang",
-    )
-
-    response = await docker_manager.create_image(request)
-    if not response.success or not response.image_id:
-        pytest.skip(f"Failed to create test image: {response.error_message}")
-
-    yield response.image_id
 
-    # Cleanup: Remove the test image
+@pytest.fixture(scope="session")
+def docker_client() -> Generator[docker.DockerClient, None, None]:
+    """Create one Docker client for the whole session, for tests that talk to Docker directly."""
     try:
-        docker_manager.client.images.remove(response.image_id, force=True)  # type: ignore[attr-defined]
-    except Exception:
-        pass  # Ignore cleanup errors
-
-
-@pytest.fixture
-async def python_image_id(docker_manager: DockerManager) -> AsyncGenerator[str, None]:
-    """Create a Python-only test image."""
-    request = CreateImageRequest(languages=[Language.PYTHON], image_name="test-python")
+        client = docker.from_env()
+    except DockerException as e:
+        pytest.skip(f"Docker is not available: {e}")
 
-    response = await docker_manager.create_image(request)
-    if not response.success or not response.image_id:
-        pytest.skip(f"Failed to create Python image: {response.error_message}")
+    yield client
 
-    yield response.image_id
-
-    # Cleanup
-    try:
-        docker_manager.client.images.remove(response.image_id, force=True)  # type: ignore[attr-defined]
-    except Exception:
-        pass
+    client.close()
 
 
 @pytest.fixture
-async def node_image_id(docker_manager: DockerManager) -> AsyncGenerator[str, None]:
-    """Create a Node.js-only test image."""
-    request = CreateImageRequest(languages=[Language.NODE], image_name="test-node")
-
-    response = await docker_manager.create_image(request)
-    if not response.success or not response.image_id:
-        pytest.skip(f"Failed to create Node.js image: {response.error_message}")
-
-    yield response.image_id
-
-    # Cleanup
+def image_cleanup(docker_client: docker.DockerClient) -> Generator[list[str], None, None]:
+    """Collect image references (IDs or tags) a test creates and remove them when it finishes."""
+    images: list[str] = []
+
+    yield images
+
+    # Newest first, so images built on top of another go before their base
+    for image in reversed(images):
+        try:
+            docker_client.images.remove(image, force=True)
+        except Exception:
+            pass  # Ignore cleanup errors
+
+
+# Comma-separated images (e.g. pulled from a CI registry) to seed the test image builds' layer cache
+_CACHE_FROM = [ref for ref in os.environ.get("MCP_TEST_CACHE_FROM", "").split(",") if ref]
+
+# Label on every image the tests build, so teardown can prune them all (and leftovers of crashed runs) at once;
+# test_docker_manager.py uses the same label
+_TEST_IMAGE_LABELS = {"mcp-test": "1"}
+
+# Requests for the images built once per session, by the languages they contain; validated once, at import
+_PY_REQ = CreateImageRequest(
+    languages=[Language.PYTHON], image_name="test-python", cache_from=_CACHE_FROM, labels=_TEST_IMAGE_LABELS
+)
+_NODE_REQ = CreateImageRequest(
+    languages=[Language.NODE], image_name="test-node", cache_from=_CACHE_FROM, labels=_TEST_IMAGE_LABELS
+)
+_CS_REQ = CreateImageRequest(
+    languages=[Language.CSHARP], image_name="test-csharp", cache_from=_CACHE_FROM, labels=_TEST_IMAGE_LABELS
+)
+_MULTI_REQ = CreateImageRequest(
+    languages=[Language.PYTHON, Language.NODE, Language.CSHARP],
+    image_name="test-multi-lang",
+    cache_from=_CACHE_FROM,
+    labels=_TEST_IMAGE_LABELS,
+)
+_TEST_IMAGE_REQUESTS = {tuple(request.languages): request for request in (_MULTI_REQ, _PY_REQ, _NODE_REQ, _CS_REQ)}
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def image_id_factory(docker_manager: DockerManager) -> AsyncGenerator[Callable[..., Awaitable[str]], None]:
+    """Return a function that gives the ID of the session test image for some languages."""
+    builds: dict[tuple[Language, ...], asyncio.Task[CreateImageResponse]] = {}
+
+    async def get(*languages: Language) -> str:
+        # The first call starts every build so they run concurrently
+        if not builds:
+            for key, request in _TEST_IMAGE_REQUESTS.items():
+                builds[key] = asyncio.create_task(docker_manager.create_image(request))
+
+        response = await builds[languages]
+        if not response.success or not response.image_id:
+            pytest.skip(
+                f"Failed to create {_TEST_IMAGE_REQUESTS[languages].image_name} image: {response.error_message}"
+            )
+        return response.image_id
+
+    yield get
+
+    # Let in-flight builds finish, then remove the warm containers that would keep the images in use
+    await asyncio.gather(*builds.values(), return_exceptions=True)
+    await asyncio.to_thread(docker_manager.drain_container_pool)
+
+    # Cleanup: Remove every labelled test image, including ones built by the tests themselves
     try:
-        docker_manager.client.images.remove(response.image_id, force=True)  # type: ignore[attr-defined]
+        await asyncio.to_thread(
+            docker_manager.client.api.prune_images,
+            filters={"dangling": False, "label": [f"{key}={value}" for key, value in _TEST_IMAGE_LABELS.items()]},
+        )
     except Exception:
-        pass
+        pass  # Ignore cleanup errors
 
 
-@pytest.fixture
-async def csharp_image_id(docker_manager: DockerManager) -> AsyncGenerator[str, None]:
-    """Create a C#-only test image."""
-    request = CreateImageRequest(languages=[Language.CSHARP], image_name="test-csharp")
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def test_image_id(image_id_factory: Callable[..., Awaitable[str]]) -> str:
+    """Test Docker image with all languages."""
+    return await image_id_factory(Language.PYTHON, Language.NODE, Language.CSHARP)
 
-    response = await docker_manager.create_image(request)
-    if not response.success or not response.image_id:
-        pytest.skip(f"Failed to create C# image: {response.error_message}")
 
-    yield response.image_id
+# Markers that place a test in a scope; tests with none of them default to integration
+_SCOPE_MARKERS = frozenset({"unit", "integration", "e2e"})
+# Fixtures that share this process's session images and container pool
+_MANAGER_FIXTURES = frozenset({"docker_manager", "image_id_factory", "test_image_id"})
+# Fixtures that make a test Docker-bound
+_DOCKER_FIXTURES = _MANAGER_FIXTURES | {"docker_client"}
 
-    # Cleanup
-    try:
-        docker_manager.client.images.remove(response.image_id, force=True)  # type: ignore[attr-defined]
-    except Exception:
-        pass
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_asyncio_loop_factories(config: Any, item: Any) -> dict[str, Callable[[], asyncio.AbstractEventLoop]]:
+    """Run the async tests and fixtures on uvloop when it is installed, like the CLI does."""
+    if uvloop is None:
+        return {"asyncio": asyncio.new_event_loop}
+    return {"uvloop": uvloop.new_event_loop}
 
 
 def pytest_collection_modifyitems(config: Any, items: list[Any]) -> None:
     """Modify test collection to add default markers."""
+    # Run every async test on the session loop that the session-scoped fixtures live on
+    session_loop = pytest.mark.asyncio(loop_scope="session")
     for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
         # Add integration marker by default if no specific marker is present
-        if not any(marker.name in ["unit", "integration", "e2e"] for marker in item.iter_markers()):
+        if _SCOPE_MARKERS.isdisjoint(marker.name for marker in item.iter_markers()):
             item.add_marker(pytest.mark.integration)
 
         # Add docker marker for tests that use Docker
-        if "docker_manager" in item.fixturenames or "test_image_id" in item.fixturenames:
+        if not _DOCKER_FIXTURES.isdisjoint(item.fixturenames):
             item.add_marker(pytest.mark.docker)
 
+        # Under xdist, tests using the in-process manager share one worker so the session images are built
+        # once; server tests build through the server and namespace their images by worker instead
+        if not _MANAGER_FIXTURES.isdisjoint(item.fixturenames):
+            item.add_marker(pytest.mark.xdist_group(name="docker"))
+
 
 def pytest_configure(config: Any) -> None:
     """Configure pytest with custom markers."""
@@ -0,0 +1,141 @@
+"""
+Unit tests for the CLI's HTTP client caches and execution polling.
+
+The server is replaced by an httpx.MockTransport, so these run without Docker or a live server.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from mcp_docker_executor import cli
+
+pytestmark = pytest.mark.unit
+
+
+def _cli(handler) -> tuple[cli.MCPCLI, list[httpx.Request]]:
+    """Build a CLI whose requests are answered by handler, recording every request."""
+    requests: list[httpx.Request] = []
+
+    def record(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return handler(request)
+
+    mcp_cli = cli.MCPCLI()
+    mcp_cli._client = httpx.AsyncClient(base_url=mcp_cli.base_url, transport=httpx.MockTransport(record))
+    return mcp_cli, requests
+
+
+class TestHealthCache:
+    """Test that health checks are reused for HEALTH_CACHE_TTL seconds."""
+
+    async def test_cache_hit(self):
+        """Test that a second check within the TTL doesn't ask the server."""
+        mcp_cli, requests = _cli(lambda _request: httpx.Response(200, json={"status": "healthy"}))
+
+        assert await mcp_cli.health_check() is True
+        assert await mcp_cli.health_check() is True
+        assert len(requests) == 1
+
+    async def test_cache_expiry(self):
+        """Test that a result older than the TTL is fetched again."""
+        mcp_cli, requests = _cli(lambda _request: httpx.Response(200, json={"status": "healthy"}))
+
+        assert await mcp_cli.health_check() is True
+        mcp_cli._health_cached = (time.monotonic() - cli.HEALTH_CACHE_TTL - 1, True)
+        assert await mcp_cli.health_check() is True
+        assert len(requests) == 2
+
+    async def test_failure_not_cached(self):
+        """Test that an unhealthy answer is not reused."""
+        mcp_cli, requests = _cli(lambda _request: httpx.Response(503))
+
+        assert await mcp_cli.health_check() is False
+        assert await mcp_cli.health_check() is False
+        assert len(requests) == 2
+
+
+class TestImageCache:
+    """Test that create_image reuses images built for the same languages and name."""
+
+    @staticmethod
+    def _created(_request: httpx.Request) -> httpx.Response:
+        """Answer every create request with a successful build."""
+        return httpx.Response(200, json={"success": True, "image_id": "sha256:abc"})
+
+    async def test_language_order_ignored(self):
+        """Test that the same languages in another order hit the cache."""
+        mcp_cli, requests = _cli(self._created)
+
+        first = await mcp_cli.create_image(["python", "node"], "demo")
+        second = await mcp_cli.create_image(["node", "python"], "demo")
+
+        assert first == second == {"success": True, "image_id": "sha256:abc"}
+        assert len(requests) == 1
+
+    async def test_name_is_part_of_key(self):
+        """Test that a different image name misses the cache."""
+        mcp_cli, requests = _cli(self._created)
+
+        await mcp_cli.create_image(["python"], "demo")
+        await mcp_cli.create_image(["python"], "other")
+        assert len(requests) == 2
+
+    async def test_concurrent_requests_build_once(self):
+        """Test that concurrent identical requests share one build."""
+        mcp_cli, requests = _cli(self._created)
+
+        await asyncio.gather(*(mcp_cli.create_image(["python"], "demo") for _ in range(3)))
+        assert len(requests) == 1
+
+    async def test_failure_not_cached(self):
+        """Test that a failed build is retried on the next request."""
+        mcp_cli, requests = _cli(lambda _request: httpx.Response(200, json={"success": False}))
+
+        await mcp_cli.create_image(["python"], "demo")
+        await mcp_cli.create_image(["python"], "demo")
+        assert len(requests) == 2
+
+
+class TestWaitForExecution:
+    """Test the long-poll loop of wait_for_execution."""
+
+    @pytest.fixture
+    def sleeps(self, monkeypatch) -> list[float]:
+        """Record the delays wait_for_execution sleeps for, without actually waiting."""
+        delays: list[float] = []
+        real_sleep = asyncio.sleep
+
+        async def fake_sleep(delay: float) -> None:
+            delays.append(delay)
+            await real_sleep(0)
+
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        return delays
+
+    async def test_backoff_until_terminal(self, sleeps, monkeypatch):
+        """Test that polling backs off exponentially up to POLL_MAX_DELAY and stops on a terminal status."""
+        monkeypatch.setattr(cli, "POLL_MAX_DELAY", 0.1)
+        statuses = iter(["running", "running", "running", "completed"])
+        mcp_cli, requests = _cli(
+            lambda _request: httpx.Response(200, json={"execution_id": "exec_1", "status": next(statuses)})
+        )
+
+        result = await mcp_cli.wait_for_execution("exec_1")
+
+        assert result == {"execution_id": "exec_1", "status": "completed"}
+        assert [request.url.path for request in requests] == ["/executions/exec_1/wait"] * 4
+        assert float(requests[0].url.params["timeout"]) == cli.LONG_POLL_TIMEOUT
+        assert sleeps == pytest.approx([cli.POLL_INITIAL_DELAY, cli.POLL_INITIAL_DELAY * cli.POLL_BACKOFF, 0.1])
+
+    async def test_timeout(self, sleeps, monkeypatch):
+        """Test that None is returned once POLL_TIMEOUT has passed."""
+        monkeypatch.setattr(cli, "POLL_TIMEOUT", 0.0)
+        mcp_cli, requests = _cli(lambda _request: httpx.Response(200, json={"status": "running"}))
+
+        assert await mcp_cli.wait_for_execution("exec_1") is None
+        assert len(requests) == 1
+        assert float(requests[0].url.params["timeout"]) == 0.0
+        assert sleeps == []
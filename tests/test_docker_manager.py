@@ -4,17 +4,23 @@ Integration tests for Docker manager.
 These tests use real Docker containers and test the actual functionality end-to-end.
 """
 
+import asyncio
+
 import pytest
 
 from mcp_docker_executor.docker_manager import DockerManager
 from mcp_docker_executor.models import (
     CreateImageRequest,
     ExecuteCodeRequest,
+    FileExecutionRequest,
     FileUploadRequest,
     InstallPackageRequest,
     Language,
 )
 
+# Label of the images the session fixtures build; conftest prunes every image carrying it at teardown
+_TEST_IMAGE_LABELS = {"mcp-test": "1"}
+
 
 @pytest.mark.integration
 @pytest.mark.docker
@@ -25,78 +31,105 @@ class TestDockerManager:
         """Test Docker health check."""
         assert await docker_manager.health_check() is True
 
-    async def test_create_multi_language_image(self, docker_manager: DockerManager) -> None:
-        """Test creating an image with multiple languages."""
+    async def test_create_image_from_scratch(self, docker_manager: DockerManager) -> None:
+        """Test building an image without the layer cache."""
         request = CreateImageRequest(
             languages=[Language.PYTHON, Language.NODE, Language.CSHARP],
-            image_name="test-multi-lang",
+            image_name="test-create-scratch",
+            force_rebuild=True,
+            labels=_TEST_IMAGE_LABELS,
         )
 
         response = await docker_manager.create_image(request)
 
         assert response.success is True
         assert response.image_id is not None
-        assert response.image_name == "test-multi-lang"
+        assert response.image_name == "test-create-scratch"
         assert len(response.build_logs) > 0
 
-        # Cleanup
-        docker_manager.client.images.remove(response.image_id, force=True)
-
-    async def test_create_python_image(self, docker_manager):
-        """Test creating a Python-only image."""
-        request = CreateImageRequest(languages=[Language.PYTHON], image_name="test-python")
-
+        # Cleanup: untag only; the session image fixtures may share this image ID
+        await asyncio.to_thread(docker_manager.client.images.remove, f"{response.image_name}:latest", force=True)
+
+    @pytest.mark.parametrize(
+        ("languages", "image_name"),
+        [
+            ([Language.PYTHON, Language.NODE, Language.CSHARP], "test-multi-lang"),
+            ([Language.PYTHON], "test-python"),
+            ([Language.NODE], "test-node"),
+            ([Language.CSHARP], "test-csharp"),
+        ],
+        ids=["multi-lang", "python", "node", "csharp"],
+    )
+    async def test_create_image_cached(self, docker_manager, image_id_factory, languages, image_name):
+        """Test that creating an already-built session image is answered from the image cache."""
+        image_id = await image_id_factory(*languages)
+
+        image = await asyncio.to_thread(docker_manager.client.images.get, f"{image_name}:latest")
+        assert image.id == image_id
+
+        request = CreateImageRequest(languages=languages, image_name=image_name, labels=_TEST_IMAGE_LABELS)
         response = await docker_manager.create_image(request)
 
         assert response.success is True
-        assert response.image_id is not None
-        assert response.image_name == "test-python"
+        assert response.cached is True
+        assert response.image_id == image_id
+        assert response.image_name == image_name
 
-        # Cleanup
-        docker_manager.client.images.remove(response.image_id, force=True)
+    async def test_execute_python_code(self, image_id_factory, docker_manager):
+        """Test executing Python code."""
+        python_image_id = await image_id_factory(Language.PYTHON)
 
-    async def test_create_node_image(self, docker_manager):
-        """Test creating a Node.js-only image."""
-        request = CreateImageRequest(languages=[Language.NODE], image_name="test-node")
+        request = ExecuteCodeRequest(
+            language=Language.PYTHON,
+            code="print('Hello from Python!')",
+            image_id=python_image_id,
+        )
 
-        response = await docker_manager.create_image(request)
+        response = await docker_manager.execute_code(request)
 
-        assert response.success is True
-        assert response.image_id is not None
-        assert response.image_name == "test-node"
+        assert response.status == "completed"
+        assert response.exit_code == 0
+        assert "Hello from Python!" in response.stdout
 
-        # Cleanup
-        docker_manager.client.images.remove(response.image_id, force=True)
+    async def test_execute_python_stderr(self, image_id_factory, docker_manager):
+        """Test that stderr is returned separately from stdout."""
+        python_image_id = await image_id_factory(Language.PYTHON)
 
-    async def test_create_csharp_image(self, docker_manager):
-        """Test creating a C#-only image."""
-        request = CreateImageRequest(languages=[Language.CSHARP], image_name="test-csharp")
+        request = ExecuteCodeRequest(
+            language=Language.PYTHON,
+            code="import sys\nprint('out')\nprint('err', file=sys.stderr)",
+            image_id=python_image_id,
+        )
 
-        response = await docker_manager.create_image(request)
+        response = await docker_manager.execute_code(request)
 
-        assert response.success is True
-        assert response.image_id is not None
-        assert response.image_name == "test-csharp"
+        assert response.status == "completed"
+        assert response.stdout.strip() == "out"
+        assert response.stderr.strip() == "err"
 
-        # Cleanup
-        docker_manager.client.images.remove(response.image_id, force=True)
+    async def test_execute_reuses_warm_container(self, image_id_factory, docker_manager):
+        """Test that consecutive executions on the same image share a warm container."""
+        python_image_id = await image_id_factory(Language.PYTHON)
 
-    async def test_execute_python_code(self, python_image_id, docker_manager):
-        """Test executing Python code."""
         request = ExecuteCodeRequest(
             language=Language.PYTHON,
-            code="print('Hello from Python!')",
+            code="print('warm')",
             image_id=python_image_id,
         )
 
-        response = await docker_manager.execute_code(request)
+        first = await docker_manager.execute_code(request)
+        second = await docker_manager.execute_code(request)
 
-        assert response.status == "completed"
-        assert response.exit_code == 0
-        assert "Hello from Python!" in response.stdout
+        assert first.status == "completed"
+        assert second.status == "completed"
+        assert "warm" in second.stdout
+        # Execution IDs end with the short ID of the container that ran them
+        assert first.execution_id.rsplit("_", 1)[1] == second.execution_id.rsplit("_", 1)[1]
 
-    async def test_execute_node_code(self, node_image_id, docker_manager):
+    async def test_execute_node_code(self, image_id_factory, docker_manager):
         """Test executing Node.js code."""
+        node_image_id = await image_id_factory(Language.NODE)
+
         request = ExecuteCodeRequest(
             language=Language.NODE,
             code="console.log('Hello from Node.js!');",
@@ -109,8 +142,10 @@ class TestDockerManager:
         assert response.exit_code == 0
         assert "Hello from Node.js!" in response.stdout
 
-    async def test_execute_csharp_code(self, csharp_image_id, docker_manager):
+    async def test_execute_csharp_code(self, image_id_factory, docker_manager):
         """Test executing C# code."""
+        csharp_image_id = await image_id_factory(Language.CSHARP)
+
         request = ExecuteCodeRequest(
             language=Language.CSHARP,
             code='Console.WriteLine("Hello from C#!");',
@@ -129,8 +164,10 @@ class TestDockerManager:
             # If it fails, it should be due to runtime issues, not syntax
             assert response.error_message is not None
 
-    async def test_execute_python_factorial(self, python_image_id, docker_manager):
+    async def test_execute_python_factorial(self, image_id_factory, docker_manager):
         """Test Python factorial calculation."""
+        python_image_id = await image_id_factory(Language.PYTHON)
+
         code = """
 def factorial(n):
     if n <= 1:
@@ -150,8 +187,10 @@ print(f"factorial(10) = {factorial(10)}")
         assert "factorial(5) = 120" in response.stdout
         assert "factorial(10) = 3628800" in response.stdout
 
-    async def test_execute_node_factorial(self, node_image_id, docker_manager):
+    async def test_execute_node_factorial(self, image_id_factory, docker_manager):
         """Test Node.js factorial calculation."""
+        node_image_id = await image_id_factory(Language.NODE)
+
         code = """
 function factorial(n) {
     if (n <= 1) {
@@ -173,8 +212,10 @@ console.log(`factorial(10) = ${factorial(10)}`);
         assert "factorial(5) = 120" in response.stdout
         assert "factorial(10) = 3628800" in response.stdout
 
-    async def test_execute_csharp_factorial(self, csharp_image_id, docker_manager):
+    async def test_execute_csharp_factorial(self, image_id_factory, docker_manager):
         """Test C# factorial calculation."""
+        csharp_image_id = await image_id_factory(Language.CSHARP)
+
         code = """
 using System;
 
@@ -208,8 +249,10 @@ public class Program
             assert "factorial(5) = 120" in response.stdout
             assert "factorial(10) = 3628800" in response.stdout
 
-    async def test_install_python_package(self, python_image_id, docker_manager):
+    async def test_install_python_package(self, image_id_factory, docker_manager):
         """Test installing a Python package."""
+        python_image_id = await image_id_factory(Language.PYTHON)
+
         request = InstallPackageRequest(
             image_id=python_image_id,
             language=Language.PYTHON,
@@ -224,10 +267,12 @@ public class Program
         assert len(response.build_logs) > 0
 
         # Cleanup
-        docker_manager.client.images.remove(response.new_image_id, force=True)
+        await asyncio.to_thread(docker_manager.client.images.remove, response.new_image_id, force=True)
 
-    async def test_install_node_package(self, node_image_id, docker_manager):
+    async def test_install_node_package(self, image_id_factory, docker_manager):
         """Test installing a Node.js package."""
+        node_image_id = await image_id_factory(Language.NODE)
+
         request = InstallPackageRequest(
             image_id=node_image_id,
             language=Language.NODE,
@@ -242,10 +287,12 @@ public class Program
         assert len(response.build_logs) > 0
 
         # Cleanup
-        docker_manager.client.images.remove(response.new_image_id, force=True)
+        await asyncio.to_thread(docker_manager.client.images.remove, response.new_image_id, force=True)
 
-    async def test_install_csharp_package(self, csharp_image_id, docker_manager):
+    async def test_install_csharp_package(self, image_id_factory, docker_manager):
         """Test installing a C# package."""
+        csharp_image_id = await image_id_factory(Language.CSHARP)
+
         request = InstallPackageRequest(
             image_id=csharp_image_id,
             language=Language.CSHARP,
@@ -260,49 +307,19 @@ public class Program
         assert len(response.build_logs) > 0
 
         # Cleanup
-        docker_manager.client.images.remove(response.new_image_id, force=True)
-
-    async def test_file_upload_python(self, docker_manager):
-        """Test uploading a Python file."""
-        request = FileUploadRequest(
-            filename="test.py",
-            content="print('Hello from uploaded Python file!')",
-            language=Language.PYTHON,
-        )
-
-        response = await docker_manager.upload_file(request)
-
-        assert response.success is True
-        assert response.file_id is not None
-        assert response.file_path is not None
-
-        # Cleanup
-        await docker_manager.delete_uploaded_file(response.file_id)
-
-    async def test_file_upload_node(self, docker_manager):
-        """Test uploading a Node.js file."""
-        request = FileUploadRequest(
-            filename="test.js",
-            content="console.log('Hello from uploaded Node.js file!');",
-            language=Language.NODE,
-        )
-
-        response = await docker_manager.upload_file(request)
-
-        assert response.success is True
-        assert response.file_id is not None
-        assert response.file_path is not None
-
-        # Cleanup
-        await docker_manager.delete_uploaded_file(response.file_id)
-
-    async def test_file_upload_csharp(self, docker_manager):
-        """Test uploading a C# file."""
-        request = FileUploadRequest(
-            filename="test.cs",
-            content='Console.WriteLine("Hello from uploaded C# file!");',
-            language=Language.CSHARP,
-        )
+        await asyncio.to_thread(docker_manager.client.images.remove, response.new_image_id, force=True)
+
+    @pytest.mark.parametrize(
+        ("filename", "content", "language"),
+        [
+            ("test.py", "print('Hello from uploaded Python file!')", Language.PYTHON),
+            ("test.js", "console.log('Hello from uploaded Node.js file!');", Language.NODE),
+            ("test.cs", 'Console.WriteLine("Hello from uploaded C# file!");', Language.CSHARP),
+        ],
+    )
+    async def test_file_upload(self, docker_manager, filename, content, language):
+        """Test uploading a file for each language."""
+        request = FileUploadRequest(filename=filename, content=content, language=language)
 
         response = await docker_manager.upload_file(request)
 
@@ -315,42 +332,45 @@ public class Program
 
     async def test_file_list_and_management(self, docker_manager):
         """Test file listing and management."""
-        # Upload a test file
-        request = FileUploadRequest(
-            filename="test_list.py",
-            content="print('Test file for listing')",
-            language=Language.PYTHON,
-        )
-
-        upload_response = await docker_manager.upload_file(request)
-        assert upload_response.success is True
-
-        # List files
-        list_response = await docker_manager.list_uploaded_files()
-        assert list_response.total_count >= 1
-
-        # Find our uploaded file
-        test_file = None
-        for file_info in list_response.files:
-            if file_info["filename"] == "test_list.py":
-                test_file = file_info
-                break
-
-        assert test_file is not None
-        assert test_file["language"] == "python"
-        assert test_file["file_id"] == upload_response.file_id
-
-        # Get file details
-        file_details = await docker_manager.get_uploaded_file(upload_response.file_id)
-        assert file_details is not None
-        assert file_details["filename"] == "test_list.py"
-        assert file_details["content"] == "print('Test file for listing')"
-
-        # Cleanup
-        await docker_manager.delete_uploaded_file(upload_response.file_id)
-
-    async def test_file_execution(self, python_image_id, docker_manager):
+        # Upload one test file per language
+        requests = [
+            FileUploadRequest(
+                filename="test_list.py", content="print('Test file for listing')", language=Language.PYTHON
+            ),
+            FileUploadRequest(filename="test_list.js", content="console.log('listing');", language=Language.NODE),
+            FileUploadRequest(
+                filename="test_list.cs", content='Console.WriteLine("listing");', language=Language.CSHARP
+            ),
+        ]
+        upload_responses = await asyncio.gather(*(docker_manager.upload_file(request) for request in requests))
+        assert all(response.success for response in upload_responses)
+        file_ids = [response.file_id for response in upload_responses]
+
+        try:
+            # List files
+            list_response = await docker_manager.list_uploaded_files()
+            assert list_response.total_count >= len(requests)
+
+            # Find our uploaded files
+            listed = {file_info["file_id"]: file_info for file_info in list_response.files}
+            for request, file_id in zip(requests, file_ids, strict=True):
+                assert listed[file_id]["filename"] == request.filename
+                assert listed[file_id]["language"] == request.language.value
+
+            # Get file details
+            file_details = await docker_manager.get_uploaded_file(file_ids[0])
+            assert file_details is not None
+            assert file_details["filename"] == "test_list.py"
+            assert file_details["content"] == "print('Test file for listing')"
+
+        finally:
+            # Cleanup
+            await asyncio.gather(*(docker_manager.delete_uploaded_file(file_id) for file_id in file_ids))
+
+    async def test_file_execution(self, image_id_factory, docker_manager):
         """Test executing an uploaded file."""
+        python_image_id = await image_id_factory(Language.PYTHON)
+
         # Upload a test file
         request = FileUploadRequest(
             filename="test_exec.py",
@@ -362,8 +382,6 @@ public class Program
         assert upload_response.success is True
 
         # Execute the file
-        from mcp_docker_executor.models import FileExecutionRequest
-
         exec_request = FileExecutionRequest(file_id=upload_response.file_id, image_id=python_image_id)
 
         exec_response = await docker_manager.execute_uploaded_file(exec_request)
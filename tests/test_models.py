@@ -66,24 +66,21 @@ class TestModels:
         assert limits.timeout_seconds == 600
         assert limits.network_enabled
 
-        # Invalid values should raise ValidationError
+    @pytest.mark.parametrize(
+        "data",
+        [
+            pytest.param({"memory_mb": 32}, id="memory-below-minimum-64"),
+            pytest.param({"memory_mb": 10000}, id="memory-above-maximum-8192"),
+            pytest.param({"cpu_cores": 0.05}, id="cpu-below-minimum-0.1"),
+            pytest.param({"cpu_cores": 10.0}, id="cpu-above-maximum-8"),
+            pytest.param({"timeout_seconds": 5}, id="timeout-below-minimum-10"),
+            pytest.param({"timeout_seconds": 4000}, id="timeout-above-maximum-3600"),
+        ],
+    )
+    def test_resource_limits_out_of_range(self, data):
+        """Test that out-of-range ResourceLimits values raise ValidationError."""
         with pytest.raises(ValidationError):
-            ResourceLimits(memory_mb=32)  # Below minimum (64)
-
-        with pytest.raises(ValidationError):
-            ResourceLimits(memory_mb=10000)  # Above maximum (8192)
-
-        with pytest.raises(ValidationError):
-            ResourceLimits(cpu_cores=0.05)  # Below minimum (0.1)
-
-        with pytest.raises(ValidationError):
-            ResourceLimits(cpu_cores=10.0)  # Above maximum (8.0)
-
-        with pytest.raises(ValidationError):
-            ResourceLimits(timeout_seconds=5)  # Below minimum (10)
-
-        with pytest.raises(ValidationError):
-            ResourceLimits(timeout_seconds=4000)  # Above maximum (3600)
+            ResourceLimits.model_validate(data)
 
     def test_create_image_request_validation(self):
         """Test CreateImageRequest validation."""
@@ -94,6 +91,8 @@ class TestModels:
         assert request.image_name == "test-image"
         assert request.requirements == {}
         assert request.base_os == "ubuntu:22.04"
+        assert request.cache_from == []
+        assert request.labels == {}
 
         # Empty languages list should raise ValidationError
         with pytest.raises(ValidationError):
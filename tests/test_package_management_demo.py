@@ -0,0 +1,102 @@
+"""
+Unit tests for the demo's batched execution poller.
+
+The server is replaced by an httpx.MockTransport, so these run without Docker or a live server.
+"""
+
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import httpx
+import pytest
+
+# The demo is a script rather than part of the package, so load it from its path
+_DEMO_PATH = Path(__file__).parent.parent / "examples" / "package_management_demo.py"
+_spec = importlib.util.spec_from_file_location("package_management_demo", _DEMO_PATH)
+assert _spec is not None and _spec.loader is not None
+demo = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(demo)
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    """Poll without delay so the tests don't wait on the backoff timer."""
+    monkeypatch.setattr(demo, "POLL_INITIAL_DELAY", 0.0)
+    monkeypatch.setattr(demo, "POLL_MAX_DELAY", 0.0)
+
+
+def _poller(statuses) -> tuple["demo.ExecutionPoller", list[list[str]]]:
+    """Build a poller whose /executions requests are answered by statuses(ids), recording each batch of IDs."""
+    batches: list[list[str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/executions"
+        ids = request.url.params["ids"].split(",")
+        batches.append(ids)
+        return statuses(ids)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return demo.ExecutionPoller(client), batches
+
+
+class TestExecutionPoller:
+    """Test ExecutionPoller against a stubbed server."""
+
+    async def test_resolves_waiters_from_one_batched_request(self):
+        """Test that concurrent waiters are answered by a single request."""
+        poller, batches = _poller(
+            lambda ids: httpx.Response(200, json=[{"execution_id": i, "status": "completed"} for i in ids])
+        )
+
+        first, second = await asyncio.gather(poller.wait("exec_1"), poller.wait("exec_2"))
+
+        assert first == {"execution_id": "exec_1", "status": "completed"}
+        assert second == {"execution_id": "exec_2", "status": "completed"}
+        assert batches == [["exec_1", "exec_2"]]
+        assert poller._scheduled is False
+
+    async def test_polls_again_until_terminal(self):
+        """Test that the timer keeps polling while the execution is still running."""
+        responses = iter(["running", "running", "failed"])
+        poller, batches = _poller(
+            lambda ids: httpx.Response(200, json=[{"execution_id": ids[0], "status": next(responses)}])
+        )
+
+        result = await poller.wait("exec_1")
+
+        assert result == {"execution_id": "exec_1", "status": "failed"}
+        assert len(batches) == 3
+        assert poller._scheduled is False
+
+    async def test_missing_execution_resolves_as_not_found(self):
+        """Test that an execution the server doesn't know resolves instead of polling forever."""
+        poller, _ = _poller(lambda ids: httpx.Response(200, json=[{"execution_id": ids[0], "status": "not_found"}]))
+
+        result = await poller.wait("exec_missing")
+
+        assert result == {"execution_id": "exec_missing", "status": "not_found"}
+
+    async def test_unanswered_execution_times_out(self, monkeypatch):
+        """Test that an execution left out of every response gives None once the timeout passes."""
+        monkeypatch.setattr(demo, "POLL_TIMEOUT", 0.05)
+        monkeypatch.setattr(demo, "POLL_MAX_DELAY", 0.01)
+        poller, batches = _poller(lambda _ids: httpx.Response(200, json=[]))
+
+        assert await poller.wait("exec_1") is None
+        assert batches
+
+    async def test_http_error_fails_waiters(self):
+        """Test that a failed status request is raised to every waiter and stops the timer."""
+        poller, _ = _poller(lambda _ids: httpx.Response(500))
+
+        results = await asyncio.gather(poller.wait("exec_1"), poller.wait("exec_2"), return_exceptions=True)
+
+        assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+        assert poller._scheduled is False
+
+        # A later waiter starts polling again
+        with pytest.raises(httpx.HTTPStatusError):
+            await poller.wait("exec_3")
@@ -4,23 +4,104 @@ Integration tests for FastAPI server endpoints.
 These tests use real HTTP requests to test the actual API functionality end-to-end.
 """
 
+import asyncio
+import gzip
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
+import docker
 import httpx
+import orjson
 import pytest
+import pytest_asyncio
 
 from mcp_docker_executor.models import Language
 
+# Request bodies are serialized with orjson and sent as raw content
+_JSON_HEADERS = {"content-type": "application/json"}
+
+# Fixed request bodies, serialized once at import
+_BATCH_UPLOAD_BODY = orjson.dumps(
+    {
+        "files": [
+            {"filename": "test_batch_api.py", "content": "print('batch')", "language": "python"},
+            {"filename": "test_batch_api.js", "content": "console.log('batch');", "language": "node"},
+        ]
+    }
+)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def client() -> AsyncGenerator[httpx.AsyncClient, None]:
+    """Create an HTTP client shared by every server test, keeping its connections alive between tests."""
+    async with httpx.AsyncClient(
+        base_url="http://localhost:8000",
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        timeout=httpx.Timeout(30.0),
+    ) as client:
+        yield client
+
+
+@asynccontextmanager
+async def _server_image(
+    client: httpx.AsyncClient, docker_client: docker.DockerClient, languages: list[str], image_name: str
+) -> AsyncGenerator[str, None]:
+    """Build an image through the server and remove its tag afterwards."""
+    response = await client.post(
+        "/images/create",
+        content=orjson.dumps({"languages": languages, "image_name": image_name}),
+        headers=_JSON_HEADERS,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True, data["error_message"]
+
+    try:
+        yield data["image_id"]
+    finally:
+        try:
+            await asyncio.to_thread(docker_client.images.remove, f"{image_name}:latest", force=True)
+        except Exception:
+            pass  # Ignore cleanup errors
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def python_image(client, docker_client, worker_id) -> AsyncGenerator[str, None]:
+    """Build one Python image shared by every server test that runs Python."""
+    async with _server_image(client, docker_client, ["python"], f"test-api-shared-python-{worker_id}") as image_id:
+        yield image_id
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def multi_lang_image(client, docker_client, worker_id) -> AsyncGenerator[str, None]:
+    """Build one multi-language image shared by the server tests that need several runtimes."""
+    languages = ["python", "node", "csharp"]
+    async with _server_image(client, docker_client, languages, f"test-api-shared-multi-lang-{worker_id}") as image_id:
+        yield image_id
+
+
+@pytest_asyncio.fixture
+async def uploaded_file(client) -> AsyncGenerator[dict, None]:
+    """Upload a Python file through the server and delete it afterwards."""
+    response = await client.post(
+        "/files/upload",
+        data={"filename": "test_lifecycle.py", "language": "python"},
+        files={"content": ("test_lifecycle.py", b"print('Test file lifecycle')")},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True, data["error_message"]
+
+    yield data
+
+    await client.delete(f"/files/{data['file_id']}")
+
 
 @pytest.mark.integration
 @pytest.mark.e2e
 class TestServerEndpoints:
     """Integration tests for server endpoints."""
 
-    @pytest.fixture
-    async def client(self):
-        """Create an HTTP client for testing."""
-        async with httpx.AsyncClient(base_url="http://localhost:8000") as client:
-            yield client
-
     async def test_health_endpoint(self, client: httpx.AsyncClient) -> None:
         """Test the health check endpoint."""
         response = await client.get("/health")
@@ -33,219 +114,168 @@ class TestServerEndpoints:
         assert "available_images" in data
         assert data["docker_available"] is True
 
-    async def test_create_image_endpoint(self, client):
+    async def test_create_image_endpoint(self, client, image_cleanup, worker_id):
         """Test the create image endpoint."""
         response = await client.post(
             "/images/create",
-            json={"languages": ["python"], "image_name": "test-api-python"},
+            content=orjson.dumps({"languages": ["python"], "image_name": f"test-api-python-{worker_id}"}),
+            headers=_JSON_HEADERS,
         )
         assert response.status_code == 200
 
         data = response.json()
         assert data["success"] is True
         assert data["image_id"] is not None
-        assert data["image_name"] == "test-api-python"
+        assert data["image_name"] == f"test-api-python-{worker_id}"
         assert len(data["build_logs"]) > 0
+        image_cleanup.append(f"{data['image_name']}:latest")
 
-        # Cleanup
-        import docker
-
-        docker_client = docker.from_env()
-        try:
-            docker_client.images.remove(data["image_id"], force=True)
-        except Exception:
-            pass
-
-    async def test_execute_code_endpoint(self, client):
+    async def test_execute_code_endpoint(self, client, python_image):
         """Test the execute code endpoint."""
-        # First create an image
-        create_response = await client.post(
-            "/images/create",
-            json={"languages": ["python"], "image_name": "test-api-execute"},
-        )
-        assert create_response.status_code == 200
-        image_data = create_response.json()
-
-        try:
-            # Execute code
-            response = await client.post(
-                "/execute",
-                json={
+        # Execute code
+        response = await client.post(
+            "/execute",
+            content=orjson.dumps(
+                {
                     "language": "python",
                     "code": "print('Hello from API test!')",
-                    "image_id": image_data["image_id"],
-                },
-            )
-            assert response.status_code == 200
-
-            data = response.json()
-            assert data["status"] == "completed"
-            assert data["exit_code"] == 0
-            assert "Hello from API test!" in data["stdout"]
-
-            # Test getting execution result
-            result_response = await client.get(f"/executions/{data['execution_id']}")
-            assert result_response.status_code == 200
-
-            result_data = result_response.json()
-            assert result_data["status"] == "completed"
-            assert "Hello from API test!" in result_data["stdout"]
-
-        finally:
-            # Cleanup
-            import docker
-
-            docker_client = docker.from_env()
-            try:
-                docker_client.images.remove(image_data["image_id"], force=True)
-            except Exception:
-                pass
-
-    async def test_install_package_endpoint(self, client):
-        """Test the install package endpoint."""
-        # First create an image
-        create_response = await client.post(
-            "/images/create",
-            json={"languages": ["python"], "image_name": "test-api-package"},
+                    "image_id": python_image,
+                }
+            ),
+            headers=_JSON_HEADERS,
         )
-        assert create_response.status_code == 200
-        image_data = create_response.json()
+        assert response.status_code == 200
 
-        try:
-            # Install package
-            response = await client.post(
-                "/packages/install",
-                json={
-                    "image_id": image_data["image_id"],
+        data = response.json()
+        assert data["status"] == "completed"
+        assert data["exit_code"] == 0
+        assert "Hello from API test!" in data["stdout"]
+
+        # Test getting execution result
+        result_response = await client.get(f"/executions/{data['execution_id']}")
+        assert result_response.status_code == 200
+
+        result_data = result_response.json()
+        assert result_data["status"] == "completed"
+        assert "Hello from API test!" in result_data["stdout"]
+
+        # A finished execution is returned by the long-poll without waiting
+        wait_response = await client.get(f"/executions/{data['execution_id']}/wait", params={"timeout": 5})
+        assert wait_response.status_code == 200
+        assert wait_response.json()["status"] == "completed"
+
+        # Several executions can be looked up in one request
+        batch_response = await client.get("/executions", params={"ids": f"{data['execution_id']},missing"})
+        assert batch_response.status_code == 200
+        batch = batch_response.json()
+        assert [item["execution_id"] for item in batch] == [data["execution_id"], "missing"]
+        assert [item["status"] for item in batch] == ["completed", "not_found"]
+
+    async def test_wait_unknown_execution_endpoint(self, client):
+        """Test that waiting on an unknown execution returns 404."""
+        response = await client.get("/executions/exec_missing/wait", params={"timeout": 0})
+        assert response.status_code == 404
+
+    async def test_install_package_endpoint(self, client, python_image, image_cleanup):
+        """Test the install package endpoint."""
+        # Install package
+        response = await client.post(
+            "/packages/install",
+            content=orjson.dumps(
+                {
+                    "image_id": python_image,
                     "language": "python",
                     "package_name": "requests",
                     "build_new_image": True,
-                },
-            )
-            assert response.status_code == 200
-
-            data = response.json()
-            assert data["success"] is True
-            assert data["new_image_id"] is not None
-            assert len(data["build_logs"]) > 0
-
-            # Cleanup new image
-            import docker
-
-            docker_client = docker.from_env()
-            try:
-                docker_client.images.remove(data["new_image_id"], force=True)
-            except Exception:
-                pass
-
-        finally:
-            # Cleanup original image
-            import docker
-
-            docker_client = docker.from_env()
-            try:
-                docker_client.images.remove(image_data["image_id"], force=True)
-            except Exception:
-                pass
-
-    async def test_file_upload_endpoint(self, client):
-        """Test the file upload endpoint."""
-        response = await client.post(
-            "/files/upload",
-            json={
-                "filename": "test_api.py",
-                "content": "print('Hello from uploaded file!')",
-                "language": "python",
-            },
+                }
+            ),
+            headers=_JSON_HEADERS,
         )
         assert response.status_code == 200
 
         data = response.json()
         assert data["success"] is True
-        assert data["file_id"] is not None
-        assert data["file_path"] is not None
+        assert data["new_image_id"] is not None
+        assert len(data["build_logs"]) > 0
+        image_cleanup.append(data["new_image_id"])
 
-        # Cleanup
-        await client.delete(f"/files/{data['file_id']}")
+    async def test_file_batch_endpoints(self, client):
+        """Test uploading and deleting several files in one request each."""
+        response = await client.post(
+            "/files/upload:batch",
+            content=_BATCH_UPLOAD_BODY,
+            headers=_JSON_HEADERS,
+        )
+        assert response.status_code == 200
 
-    async def test_file_list_endpoint(self, client):
-        """Test the file list endpoint."""
-        # Upload a test file first
-        upload_response = await client.post(
-            "/files/upload",
-            json={
-                "filename": "test_list_api.py",
-                "content": "print('Test file for listing')",
-                "language": "python",
-            },
+        results = response.json()
+        assert len(results) == 2
+        assert all(result["success"] for result in results)
+        file_ids = [result["file_id"] for result in results]
+
+        delete_response = await client.post(
+            "/files:delete-batch", content=orjson.dumps({"file_ids": [*file_ids, "missing"]}), headers=_JSON_HEADERS
         )
-        assert upload_response.status_code == 200
-        upload_data = upload_response.json()
+        assert delete_response.status_code == 200
 
-        try:
-            # List files
-            response = await client.get("/files")
-            assert response.status_code == 200
+        data = delete_response.json()
+        assert data["deleted"] == file_ids
+        assert data["not_found"] == ["missing"]
 
-            data = response.json()
-            assert "files" in data
-            assert "total_count" in data
-            assert data["total_count"] >= 1
+    async def test_gzip_request_body(self, client):
+        """Test that gzip-compressed JSON request bodies are accepted."""
+        response = await client.post(
+            "/files:delete-batch",
+            content=gzip.compress(b'{"file_ids": ["missing"]}'),
+            headers={"content-type": "application/json", "content-encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.json()["not_found"] == ["missing"]
 
-            # Find our uploaded file
-            test_file = None
-            for file_info in data["files"]:
-                if file_info["filename"] == "test_list_api.py":
-                    test_file = file_info
-                    break
+    async def test_file_lifecycle(self, client, uploaded_file):
+        """Test listing an uploaded file and fetching its info and content."""
+        file_id = uploaded_file["file_id"]
+        assert file_id is not None
+        assert uploaded_file["file_path"] is not None
 
-            assert test_file is not None
-            assert test_file["language"] == "python"
-            assert test_file["file_id"] == upload_data["file_id"]
+        # List files
+        response = await client.get("/files")
+        assert response.status_code == 200
 
-        finally:
-            # Cleanup
-            await client.delete(f"/files/{upload_data['file_id']}")
+        data = response.json()
+        assert "files" in data
+        assert "total_count" in data
+        assert data["total_count"] >= 1
 
-    async def test_file_info_endpoint(self, client):
-        """Test the file info endpoint."""
-        # Upload a test file first
-        upload_response = await client.post(
-            "/files/upload",
-            json={
-                "filename": "test_info_api.py",
-                "content": "print('Test file for info')",
-                "language": "python",
-            },
-        )
-        assert upload_response.status_code == 200
-        upload_data = upload_response.json()
+        # Find our uploaded file
+        test_file = next((f for f in data["files"] if f["file_id"] == file_id), None)
 
-        try:
-            # Get file info
-            response = await client.get(f"/files/{upload_data['file_id']}")
-            assert response.status_code == 200
+        assert test_file is not None
+        assert test_file["filename"] == "test_lifecycle.py"
+        assert test_file["language"] == "python"
 
-            data = response.json()
-            assert data["filename"] == "test_info_api.py"
-            assert data["content"] == "print('Test file for info')"
-            assert data["language"] == "python"
-            assert data["file_id"] == upload_data["file_id"]
+        # Get file info
+        response = await client.get(f"/files/{file_id}")
+        assert response.status_code == 200
 
-        finally:
-            # Cleanup
-            await client.delete(f"/files/{upload_data['file_id']}")
+        data = response.json()
+        assert data["filename"] == "test_lifecycle.py"
+        assert "content" not in data
+        assert data["language"] == "python"
+        assert data["file_id"] == file_id
+
+        # Get file content
+        response = await client.get(f"/files/{file_id}/content")
+        assert response.status_code == 200
+        assert response.text == "print('Test file lifecycle')"
 
     async def test_file_delete_endpoint(self, client):
         """Test the file delete endpoint."""
         # Upload a test file first
         upload_response = await client.post(
             "/files/upload",
-            json={
-                "filename": "test_delete_api.py",
-                "content": "print('Test file for deletion')",
-                "language": "python",
-            },
+            data={"filename": "test_delete_api.py", "language": "python"},
+            files={"content": ("test_delete_api.py", b"print('Test file for deletion')")},
         )
         assert upload_response.status_code == 200
         upload_data = upload_response.json()
@@ -262,54 +292,35 @@ class TestServerEndpoints:
         info_response = await client.get(f"/files/{upload_data['file_id']}")
         assert info_response.status_code == 404
 
-    async def test_file_execute_endpoint(self, client):
+    async def test_file_execute_endpoint(self, client, python_image):
         """Test the file execute endpoint."""
         # Upload a test file first
         upload_response = await client.post(
             "/files/upload",
-            json={
-                "filename": "test_exec_api.py",
-                "content": "print('Hello from executed file!')",
-                "language": "python",
-            },
+            data={"filename": "test_exec_api.py", "language": "python"},
+            files={"content": ("test_exec_api.py", b"print('Hello from executed file!')")},
         )
         assert upload_response.status_code == 200
         upload_data = upload_response.json()
 
         try:
-            # Create an image for execution
-            create_response = await client.post(
-                "/images/create",
-                json={"languages": ["python"], "image_name": "test-api-file-exec"},
-            )
-            assert create_response.status_code == 200
-            image_data = create_response.json()
-
-            try:
-                # Execute the file
-                response = await client.post(
-                    f"/files/{upload_data['file_id']}/execute",
-                    json={
+            # Execute the file
+            response = await client.post(
+                f"/files/{upload_data['file_id']}/execute",
+                content=orjson.dumps(
+                    {
                         "file_id": upload_data["file_id"],
-                        "image_id": image_data["image_id"],
-                    },
-                )
-                assert response.status_code == 200
-
-                data = response.json()
-                assert data["status"] == "completed"
-                assert data["exit_code"] == 0
-                assert "Hello from executed file!" in data["stdout"]
-
-            finally:
-                # Cleanup image
-                import docker
-
-                docker_client = docker.from_env()
-                try:
-                    docker_client.images.remove(image_data["image_id"], force=True)
-                except Exception:
-                    pass
+                        "image_id": python_image,
+                    }
+                ),
+                headers=_JSON_HEADERS,
+            )
+            assert response.status_code == 200
+
+            data = response.json()
+            assert data["status"] == "completed"
+            assert data["exit_code"] == 0
+            assert "Hello from executed file!" in data["stdout"]
 
         finally:
             # Cleanup file
@@ -330,68 +341,100 @@ class TestServerEndpoints:
         for language in Language:
             assert language.value in data["files_by_language"]
 
-    async def test_multi_language_execution(self, client):
-        """Test execution in multiple languages."""
-        # Create multi-language image
-        create_response = await client.post(
-            "/images/create",
-            json={
-                "languages": ["python", "node", "csharp"],
-                "image_name": "test-api-multi-lang",
-            },
+    async def test_file_stats_etag(self, client):
+        """Test that unchanged file stats are answered with 304 Not Modified."""
+        response = await client.get("/files/stats")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        response = await client.get("/files/stats", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+        # Uploading a file changes the ETag
+        upload_response = await client.post(
+            "/files/upload",
+            data={"filename": "test_etag.py", "language": "python"},
+            files={"content": ("test_etag.py", b"print('etag')")},
         )
-        assert create_response.status_code == 200
-        image_data = create_response.json()
+        try:
+            response = await client.get("/files/stats", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+        finally:
+            await client.delete(f"/files/{upload_response.json()['file_id']}")
+
+    async def test_file_list_etag(self, client):
+        """Test that an unchanged file listing is answered with 304 Not Modified."""
+        response = await client.get("/files")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        response = await client.get("/files", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+    async def test_file_list_etag_changes_on_upload(self, client):
+        """Test that uploading a file changes the listing's ETag and returns the new listing."""
+        etag = (await client.get("/files")).headers["etag"]
 
+        upload_response = await client.post(
+            "/files/upload",
+            data={"filename": "test_list_etag.py", "language": "python"},
+            files={"content": ("test_list_etag.py", b"print('list etag')")},
+        )
+        assert upload_response.status_code == 200
+        file_id = upload_response.json()["file_id"]
         try:
-            # Test Python execution
-            python_response = await client.post(
-                "/execute",
-                json={
-                    "language": "python",
-                    "code": "print('Python works!')",
-                    "image_id": image_data["image_id"],
-                },
-            )
-            assert python_response.status_code == 200
-            python_data = python_response.json()
-            assert python_data["status"] == "completed"
-            assert "Python works!" in python_data["stdout"]
+            response = await client.get("/files", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+            assert any(f["file_id"] == file_id for f in response.json()["files"])
+        finally:
+            await client.delete(f"/files/{file_id}")
 
-            # Test Node.js execution
-            node_response = await client.post(
+    async def test_multi_language_execution(self, client, multi_lang_image):
+        """Test execution in multiple languages."""
+        # Run all three languages concurrently; the server executes them in separate warm containers
+        python_response, node_response, csharp_response = await asyncio.gather(
+            client.post(
                 "/execute",
-                json={
-                    "language": "node",
-                    "code": "console.log('Node.js works!');",
-                    "image_id": image_data["image_id"],
-                },
-            )
-            assert node_response.status_code == 200
-            node_data = node_response.json()
-            assert node_data["status"] == "completed"
-            assert "Node.js works!" in node_data["stdout"]
-
-            # Test C# execution (might fail due to ICU library issues)
-            csharp_response = await client.post(
+                content=orjson.dumps(
+                    {"language": "python", "code": "print('Python works!')", "image_id": multi_lang_image}
+                ),
+                headers=_JSON_HEADERS,
+            ),
+            client.post(
                 "/execute",
-                json={
-                    "language": "csharp",
-                    "code": 'Console.WriteLine("C# works!");',
-                    "image_id": image_data["image_id"],
-                },
-            )
-            assert csharp_response.status_code == 200
-            csharp_data = csharp_response.json()
-            # C# might fail due to runtime issues, but the request should succeed
-            assert csharp_data["status"] in ["completed", "failed"]
+                content=orjson.dumps(
+                    {"language": "node", "code": "console.log('Node.js works!');", "image_id": multi_lang_image}
+                ),
+                headers=_JSON_HEADERS,
+            ),
+            client.post(
+                "/execute",
+                content=orjson.dumps(
+                    {"language": "csharp", "code": 'Console.WriteLine("C# works!");', "image_id": multi_lang_image}
+                ),
+                headers=_JSON_HEADERS,
+            ),
+        )
 
-        finally:
-            # Cleanup
-            import docker
-
-            docker_client = docker.from_env()
-            try:
-                docker_client.images.remove(image_data["image_id"], force=True)
-            except Exception:
-                pass
+        # Test Python execution
+        assert python_response.status_code == 200
+        python_data = python_response.json()
+        assert python_data["status"] == "completed"
+        assert "Python works!" in python_data["stdout"]
+
+        # Test Node.js execution
+        assert node_response.status_code == 200
+        node_data = node_response.json()
+        assert node_data["status"] == "completed"
+        assert "Node.js works!" in node_data["stdout"]
+
+        # Test C# execution (might fail due to ICU library issues)
+        assert csharp_response.status_code == 200
+        csharp_data = csharp_response.json()
+        # C# might fail due to runtime issues, but the request should succeed
+        assert csharp_data["status"] in ["completed", "failed"]
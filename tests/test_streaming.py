@@ -0,0 +1,170 @@
+"""
+Unit tests for push-based streaming execution progress.
+
+The Docker client is a stand-in and execute_code is replaced, so these run without Docker.
+"""
+
+import asyncio
+from collections.abc import AsyncGenerator
+from types import SimpleNamespace
+
+import httpx
+import orjson
+import pytest
+import pytest_asyncio
+
+from mcp_docker_executor import docker_manager as docker_manager_module
+from mcp_docker_executor import server
+from mcp_docker_executor.docker_manager import DockerManager
+from mcp_docker_executor.models import ExecuteCodeResponse, ExecutionStatus, Language, StreamExecutionRequest
+
+pytestmark = pytest.mark.unit
+
+_REQUEST = StreamExecutionRequest(language=Language.PYTHON, code="print('done')")
+
+
+class _StubDockerClient:
+    """Docker client stand-in for tests that never reach the daemon."""
+
+    def ping(self) -> bool:
+        """Report the daemon as reachable."""
+        return True
+
+    def close(self) -> None:
+        """Nothing to close."""
+
+
+@pytest_asyncio.fixture
+async def manager(tmp_path, monkeypatch) -> AsyncGenerator[tuple[DockerManager, asyncio.Event], None]:
+    """Create a manager whose executions finish, printing "done", once the returned event is set."""
+    # FileManager keeps its uploads under the working directory
+    monkeypatch.chdir(tmp_path)
+    manager = DockerManager(client=_StubDockerClient())
+    release = asyncio.Event()
+
+    async def execute_code(request) -> ExecuteCodeResponse:
+        await release.wait()
+        return ExecuteCodeResponse(execution_id="exec_1", status=ExecutionStatus.COMPLETED, stdout="done\n")
+
+    monkeypatch.setattr(manager, "execute_code", execute_code)
+
+    yield manager, release
+
+    release.set()
+    await asyncio.gather(*(data["task"] for data in manager.streaming_executions.values()))
+    manager.close()
+
+
+class TestStreamingSubscriptions:
+    """Test subscribe, unsubscribe and _publish."""
+
+    async def test_subscriber_receives_published_progress(self, manager):
+        """Test that a subscriber gets the current progress, each update and the final result."""
+        docker_manager, release = manager
+        await docker_manager.start_streaming_execution("stream_1", _REQUEST)
+        queue = docker_manager.subscribe("stream_1")
+        assert queue is not None
+
+        assert (await queue.get())["status"] == "running"
+
+        execution_data = docker_manager.streaming_executions["stream_1"]
+        docker_manager._append_logs(execution_data, ["step 1"])
+        docker_manager._publish("stream_1")
+        assert (await queue.get())["logs"] == ["step 1"]
+
+        release.set()
+        final = await asyncio.wait_for(queue.get(), 5)
+        assert final["status"] == "completed"
+        assert final["logs"] == ["step 1", "done"]
+
+    async def test_unsubscribe_removes_queue(self, manager):
+        """Test that an unsubscribed queue gets no further updates."""
+        docker_manager, release = manager
+        await docker_manager.start_streaming_execution("stream_1", _REQUEST)
+        queue = docker_manager.subscribe("stream_1")
+        assert queue is not None
+
+        docker_manager.unsubscribe("stream_1", queue)
+        assert docker_manager.streaming_executions["stream_1"]["subscribers"] == []
+
+        release.set()
+        await docker_manager.wait_for_execution("stream_1", timeout=5)
+        assert queue.qsize() == 1
+
+    async def test_subscribe_after_finish(self, manager):
+        """Test that subscribing to a finished execution gives its result without registering the queue."""
+        docker_manager, release = manager
+        release.set()
+        await docker_manager.start_streaming_execution("stream_1", _REQUEST)
+        await docker_manager.wait_for_execution("stream_1", timeout=5)
+
+        queue = docker_manager.subscribe("stream_1")
+        assert queue is not None
+        assert queue.get_nowait()["status"] == "completed"
+        assert docker_manager.streaming_executions["stream_1"]["subscribers"] == []
+
+    async def test_subscribe_unknown_execution(self, manager):
+        """Test that subscribing to an unknown execution gives None."""
+        docker_manager, _ = manager
+        assert docker_manager.subscribe("stream_missing") is None
+
+
+class TestStreamEndpoint:
+    """Test the server-sent event route on top of the subscriptions."""
+
+    async def test_stream_ends_when_execution_finishes(self, manager, monkeypatch):
+        """Test that the event stream sends progress until the execution finishes, then closes."""
+        docker_manager, release = manager
+        monkeypatch.setattr(server, "mcp_server", SimpleNamespace(docker_manager=docker_manager))
+        await docker_manager.start_streaming_execution("stream_1", _REQUEST)
+        execution_data = docker_manager.streaming_executions["stream_1"]
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+            request = asyncio.create_task(client.get("/executions/stream_1/stream"))
+            # Finish the execution only once the route is subscribed
+            while not execution_data["subscribers"] and not request.done():
+                await asyncio.sleep(0)
+            release.set()
+            response = await asyncio.wait_for(request, 5)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [orjson.loads(line.removeprefix(b"data: ")) for line in response.content.split(b"\n\n") if line]
+        assert [event["status"] for event in events] == ["running", "completed"]
+        assert events[-1]["response"]["stdout"] == "done\n"
+        assert execution_data["subscribers"] == []
+
+    async def test_stream_unknown_execution(self, manager, monkeypatch):
+        """Test that streaming an unknown execution returns 404."""
+        docker_manager, _ = manager
+        monkeypatch.setattr(server, "mcp_server", SimpleNamespace(docker_manager=docker_manager))
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+            response = await client.get("/executions/stream_missing/stream")
+
+        assert response.status_code == 404
+
+
+class TestStreamingExpiry:
+    """Test that finished streaming executions are forgotten after STREAM_RESULT_TTL."""
+
+    async def test_finished_entries_expire(self, manager, monkeypatch):
+        """Test that only executions finished longer than the TTL ago are dropped."""
+        docker_manager, _ = manager
+        await docker_manager.start_streaming_execution("stream_running", _REQUEST)
+        docker_manager.streaming_executions["stream_finished"] = {
+            "status": "completed",
+            "end_time": 1_000.0,
+            "done": asyncio.Event(),
+            "task": asyncio.create_task(asyncio.sleep(0)),
+        }
+        docker_manager.streaming_executions["stream_finished"]["done"].set()
+
+        now = 1_000.0 + docker_manager_module.STREAM_RESULT_TTL
+        monkeypatch.setattr(docker_manager_module.time, "time", lambda: now)
+        docker_manager._expire_streaming()
+        assert set(docker_manager.streaming_executions) == {"stream_running", "stream_finished"}
+
+        now += 1
+        docker_manager._expire_streaming()
+        assert set(docker_manager.streaming_executions) == {"stream_running"}